@@ -1,159 +1,137 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import streamlit as st
-from wordcloud import WordCloud
-from analysis.preprocessing import preprocess_text
+from analysis.plots import render_word_cloud, show_figure
+from analysis.terms import distinctive_terms
 
 
-def compare_polarity(trump_polarities, harris_polarities):
+def _draw_polarity_boxplot(fig, box_stats, colors):
+    ax = fig.subplots()
+    boxes = ax.bxp([{**stats, "label": name} for name, stats in box_stats.items()], patch_artist=True,
+                   showfliers=True)
+    for patch, name in zip(boxes["boxes"], box_stats):
+        patch.set_facecolor(colors[name])
+    ax.set_xlabel("Category")
+    ax.set_ylabel("Polarity")
+    ax.set_title("Polarity Distribution Comparison")
+
+
+def compare_polarity(summary, colors):
     """
-    Compare polarity distribution using a boxplot
+    Compare polarity distribution using a boxplot drawn from precomputed statistics
     Parameters:
-    - trump_polarities (list): List of polarity scores for Trump's articles
-    - harris_polarities (list): List of polarity scores for Harris's articles
+    - summary (dict): The pre-aggregated scores returned by summarize_scores
+    - colors (dict): Plot color of each subject
     Returns:
     - None: Displays the boxplot comparison using Streamlit
     """
-    # Create a DataFrame with polarity data for both Trump and Harris
-    data = pd.DataFrame({
-        "Polarity": trump_polarities + harris_polarities,
-        "Category": ["Trump"] * len(trump_polarities) + ["Harris"] * len(harris_polarities)
-    })
-    # Plot the boxplot
-    plt.figure(figsize=(8, 5))
-    sns.boxplot(x="Category", y="Polarity", data=data, palette=["red", "blue"])
-    plt.title("Polarity Distribution Comparison")
-    st.pyplot(plt)
-
-
-def compare_subjectivity(trump_subjectivities, harris_subjectivities):
+    # Plot the boxplot, the quartiles and whiskers were computed once per subject
+    box_stats = {name: summary["box"]["polarity"][name] for name in summary["subjects"]}
+    show_figure(_draw_polarity_boxplot, box_stats, colors)
+
+
+def _draw_subjectivity_kde(fig, kde, colors):
+    ax = fig.subplots()
+    for name, (grid, density) in kde.items():
+        ax.plot(grid, density, label=name, color=colors[name])
+        ax.fill_between(grid, density, alpha=0.25, color=colors[name])
+    ax.set_title("Subjectivity Distribution Comparison")
+    ax.set_xlabel("Subjectivity Score")
+    ax.set_ylabel("Density")
+    ax.legend()
+
+
+def compare_subjectivity(summary, colors):
     """
     Compare subjectivity scores using a Kernel Density Estimate (KDE) plot.
     Parameters:
-    - trump_subjectivities (list): List of subjectivity scores for Trump's articles
-    - harris_subjectivities (list): List of subjectivity scores for Harris's articles
+    - summary (dict): The pre-aggregated scores returned by summarize_scores
+    - colors (dict): Plot color of each subject
     Returns:
     - None: Displays the KDE plot comparison using Streamlit
     """
-    # Plot the KDE
-    plt.figure(figsize=(8, 5))
-    sns.kdeplot(trump_subjectivities, label="Trump", shade=True, color="red")
-    sns.kdeplot(harris_subjectivities, label="Harris", shade=True, color="blue")
-    plt.title("Subjectivity Distribution Comparison")
-    plt.xlabel("Subjectivity Score")
-    plt.legend()
-    st.pyplot(plt)
+    # Plot the KDE grids, no density is estimated here
+    kde = {name: summary["kde"]["subjectivity"][name] for name in summary["subjects"]}
+    show_figure(_draw_subjectivity_kde, kde, colors)
+
 
+def _draw_average_sentiment(fig, df):
+    ax = fig.subplots()
+    df.plot(kind="bar", ax=ax, colormap="coolwarm")
+    ax.set_title("Average Polarity and Subjectivity")
 
-def average_sentiment(trump_polarities, harris_polarities, trump_subjectivities, harris_subjectivities):
+
+def average_sentiment(summary):
     """
     Compare average sentiment scores for polarity and subjectivity
     Parameters:
-    - trump_polarities (list): List of polarity scores for Trump's articles
-    - harris_polarities (list): List of polarity scores for Harris's articles
-    - trump_subjectivities (list): List of subjectivity scores for Trump's articles
-    - harris_subjectivities (list): List of subjectivity scores for Harris's articles
+    - summary (dict): The pre-aggregated scores returned by summarize_scores
     Returns:
     - None: Displays the average sentiment bar chart using Streamlit
     """
-    # Create a DataFrame with average sentiment scores for both Trump and Harris
-    df = pd.DataFrame({
-        "Category": ["Trump", "Harris"],
-        "Avg Polarity": [sum(trump_polarities)/len(trump_polarities), sum(harris_polarities)/len(harris_polarities)],
-        "Avg Subjectivity": [sum(trump_subjectivities)/len(trump_subjectivities), sum(harris_subjectivities)/len(harris_subjectivities)]
-    })
+    # The means were computed per subject in one grouped pass
+    df = summary["means"].rename(columns={"polarity": "Avg Polarity", "subjectivity": "Avg Subjectivity"})
+    df.index = df.index.astype(str).rename("Category")
 
     # Plot the bar chart
-    df.set_index("Category").plot(kind="bar", figsize=(8, 5), colormap="coolwarm")
-    plt.title("Average Polarity and Subjectivity")
-    st.pyplot(plt)
+    show_figure(_draw_average_sentiment, df)
 
 
-def generate_wordcloud(text_data, title, base_color, highlight_color, highlight_words=None):
+def generate_wordcloud(term_counts, base_color, highlight_color, highlight_words=None):
     """
-    Generate a word cloud from text data with highlighting words unique to Harris and Trump
+    Generate a word cloud from term counts with highlighting the words distinctive of one subject
     Parameters:
-    - text_data (list): List of text data (articles or sentences) to generate the word cloud
-    - title (str): The title for the word cloud plot
+    - term_counts (dict): The count of every term in the articles of the subject
     - base_color (str): The base color of the words in the word cloud
     - highlight_color (str): The color for words that are highlighted
-    - highlight_words (list): List of words to highlight in the word cloud
+    - highlight_words (set): Words to highlight in the word cloud
     Returns:
-    - fig (matplotlib.figure.Figure): The generated word cloud figure
-    """
-    # Function to highlight unique words
-    def color_func(word, *args, **kwargs):
-        return highlight_color if word in highlight_words else base_color
-
-    # Generate the word cloud
-    wordcloud = WordCloud(width=600, height=400, background_color="white", color_func=color_func, max_words=50).generate(" ".join(text_data))
- 
-    # Display the word cloud
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.imshow(wordcloud, interpolation="bilinear")
-    ax.axis("off")
-    ax.set_title(title)
-    return fig
-
-
-def get_unique_words(text_data1, text_data2):
+    - bytes: The PNG image of the word cloud
     """
-    Get unique words from two text datasets by comparing them
-    Parameters:
-    - text_data1 (list): The first dataset of text data
-    - text_data2 (list): The second dataset of text data
-    Returns:
-    - unique_to_1 (set): Words that are unique to the first dataset
-    - unique_to_2 (set): Words that are unique to the second dataset
-    """
-    # Split text data into words and create sets
-    words1 = set(" ".join(text_data1).split())
-    words2 = set(" ".join(text_data2).split())
-    # Find words unique to each dataset
-    unique_to_1 = words1 - words2
-    unique_to_2 = words2 - words1
-    return unique_to_1, unique_to_2
+    return render_word_cloud(term_counts, width=600, height=400, base_color=base_color,
+                             highlight_color=highlight_color, highlight_words=highlight_words or set())
 
 
-def display_comparisons(trump_polarities, harris_polarities, trump_subjectivities, harris_subjectivities, trump_texts, harris_texts):
+def display_comparisons(summary, term_counts, colors, distinctive=None):
     """
     Display all comparison visualizations (polarity, subjectivity, average sentiment, word clouds) in Streamlit
     Parameters:
-    - trump_polarities (list), harris_polarities (list): Polarity scores for Trump and Harris
-    - trump_subjectivities (list), harris_subjectivities (list): Subjectivity scores for Trump and Harris
-    - trump_texts (list), harris_texts (list): Text data for Trump and Harris articles
+    - summary (dict): The pre-aggregated scores returned by summarize_scores
+    - term_counts (dict): Precomputed term counts of all the articles of each subject, keyed by subject name
+    - colors (dict): Plot color of each subject
+    - distinctive (dict): The distinctive terms of each subject returned by distinctive_terms, computed here
+      when not given
     Returns:
     - None: Displays the comparison visualizations using Streamlit
     """
-    st.header("Comparing Sentiment Between Trump and Harris Articles")
-    
+    names = summary["subjects"]
+    if len(names) < 2:
+        st.info("Not enough articles left to compare.")
+        return
+    st.header(f"Comparing Sentiment Between {', '.join(names[:-1])} and {names[-1]} Articles")
+    if "cross_listed" in summary:
+        st.caption(", ".join(f"{name}: {summary['counts'][name]} articles, {summary['cross_listed'][name]} "
+                             f"cross-listed" for name in names))
+
     # Polarity Comparison
     st.subheader("Polarity Comparison")
-    compare_polarity(trump_polarities, harris_polarities)
+    compare_polarity(summary, colors)
 
     # Subjectivity Comparison
     st.subheader("Subjectivity Comparison")
-    compare_subjectivity(trump_subjectivities, harris_subjectivities)
+    compare_subjectivity(summary, colors)
 
     # Average Sentiment Scores
     st.subheader("Average Sentiment Scores")
-    average_sentiment(trump_polarities, harris_polarities, trump_subjectivities, harris_subjectivities)
-
-    trump_texts = [preprocess_text(text) for text in trump_texts]
-    harris_texts = [preprocess_text(text) for text in harris_texts]
-    # Get unique words
-    unique_to_trump, unique_to_harris = get_unique_words(trump_texts, harris_texts)
-
-    # Create columns for side-by-side display
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("Trump Word Cloud")
-        trump_fig = generate_wordcloud(trump_texts, "Trump Word Cloud", "black", "red", highlight_words=unique_to_trump)
-        st.pyplot(trump_fig)
-
-    with col2:
-        st.subheader("Harris Word Cloud")
-        harris_fig = generate_wordcloud(harris_texts, "Harris Word Cloud", "black", "blue", highlight_words=unique_to_harris)
-        st.pyplot(harris_fig)
\ No newline at end of file
+    average_sentiment(summary)
+
+    # Highlight the terms each subject uses markedly more than the others
+    if distinctive is None:
+        distinctive = distinctive_terms({name: term_counts[name] for name in names})
+
+    # Show the word clouds side by side, two per row
+    for row in range(0, len(names), 2):
+        for name, col in zip(names[row:row + 2], st.columns(2)):
+            with col:
+                st.subheader(f"{name} Word Cloud")
+                image = generate_wordcloud(term_counts[name], "black", colors[name],
+                                           highlight_words=set(distinctive[name].index))
+                st.image(image, use_container_width=True)
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from analysis.plots import show_figure
+
+
+def stage_table(summary):
+    """
+    Tabulate the stage timings of a run
+    Parameters:
+    - summary (dict): The run summary returned by latest_run
+    Returns:
+    - pd.DataFrame: One row per stage, slowest first, with its total seconds, share of the run, calls,
+      items and items per second
+    """
+    stages = pd.DataFrame.from_dict(summary["stages"], orient="index", columns=["seconds", "calls", "items"])
+    stages.index.name = "stage"
+    duration = summary["finished_at"] - summary["started_at"]
+    stages["share"] = stages["seconds"] / duration if duration > 0 else 0.0
+    stages["items_per_sec"] = stages["items"] / stages["seconds"].where(stages["seconds"] > 0)
+    return stages.sort_values("seconds", ascending=False)
+
+
+def _draw_stage_breakdown(fig, stages):
+    ax = fig.subplots()
+    ax.barh(stages.index[::-1], stages["seconds"][::-1], color="steelblue")
+    ax.set_xlabel("Seconds")
+    ax.set_title("Time Spent per Stage")
+
+
+def display_pipeline_health(summary):
+    """
+    Show the stage breakdown and the counters of the latest refresh run
+    Parameters:
+    - summary (dict): The run summary returned by latest_run, None before the first run
+    Returns:
+    - None: Displays the page using Streamlit
+    """
+    if summary is None:
+        st.info("No refresh has been recorded yet. Run `python refresh.py` to record one.")
+        return
+
+    duration = summary["finished_at"] - summary["started_at"]
+    stages = stage_table(summary)
+    counters = summary["counters"]
+    articles = sum(value for key, value in counters.items() if key.split("{")[0] == "articles")
+    st.caption(f"Run started {datetime.fromtimestamp(summary['started_at']):%Y-%m-%d %H:%M:%S}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Duration", f"{duration:.1f}s")
+    col2.metric("Articles", articles)
+    col3.metric("Cache hits", counters.get("cache_hits", 0))
+
+    if not stages.empty:
+        st.subheader("Stage Breakdown")
+        # Stages can overlap (downloads run in parallel), so the shares need not add up to 100%
+        show_figure(_draw_stage_breakdown, stages, figsize=(8, max(2, 0.5 * len(stages))))
+        st.dataframe(stages.style.format({"seconds": "{:.3f}", "share": "{:.1%}", "items_per_sec": "{:.1f}"}))
+
+    if counters:
+        st.subheader("Counters")
+        st.dataframe(pd.Series(counters, name="value").rename_axis("counter").sort_index())
@@ -1,47 +1,163 @@
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import seaborn as sns
+import hashlib
+import io
+import json
+import pickle
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+import pandas as pd
 import streamlit as st
 
-def plot_word_cloud(article_texts):
+# Number of rendered word clouds kept in memory
+WORD_CLOUD_CACHE_SIZE = 32
+_word_cloud_cache = OrderedDict()
+
+# Number of rendered figures kept in memory
+FIGURE_CACHE_SIZE = 64
+_figure_cache = OrderedDict()
+
+# Streamlit runs each session on its own thread, so the caches are only touched while holding this lock
+_cache_lock = threading.Lock()
+
+# Tables with more rows than this are shown as a paginated dataframe instead of a drawn table
+TABLE_FIGURE_MAX_ROWS = 30
+TABLE_PAGE_SIZE = 50
+
+
+def _cache_get(cache, key):
+    # Returns None on a miss, a hit becomes the most recently used entry
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+def _cache_put(cache, key, value, size):
+    # Keeps at most size entries, dropping the least recently used ones
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+    return value
+
+def data_hash(*values):
     """
-    Generate and display a word cloud from a list of article texts
+    Hash the data a figure is drawn from, cheaply for pandas and NumPy data
     Parameters:
-    - article_texts (list): List of article texts to generate the word cloud
+    - values: Series, DataFrames, arrays or any picklable values
     Returns:
-    - None: Displays the word cloud using Streamlit
+    - str: A hex digest that changes whenever the data does
     """
-    # Make sure that article_texts is not empty
-    if not article_texts:
-        print("No article texts available to generate word cloud.")
-        return
-
-    # Join all article texts into a single string
-    text = ' '.join(article_texts)
-
-    # Generate the word cloud
-    wordcloud = WordCloud(width=800, height=400, background_color='white',max_words=50).generate(text)
-    print(wordcloud.words_)
-    # Plot the word cloud
-    plt.figure(figsize=(10, 6))
-    plt.imshow(wordcloud)  
-    plt.axis('off')  
-    st.pyplot(plt)
-
+    digest = hashlib.sha1()
+    for value in values:
+        if isinstance(value, (pd.Series, pd.DataFrame, pd.Index)):
+            digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+            digest.update(pickle.dumps(list(value.columns) if isinstance(value, pd.DataFrame) else value.name))
+        elif isinstance(value, np.ndarray):
+            digest.update(str(value.dtype).encode("utf-8") + value.tobytes())
+        else:
+            digest.update(pickle.dumps(value))
+    return digest.hexdigest()
 
+def render_figure(draw, *data, figsize=(8, 5), fmt="png"):
+    """
+    Render a figure as image bytes, cached by a hash of the drawing function and its data
+    Parameters:
+    - draw (callable): Draws on a matplotlib Figure, called as draw(fig, *data)
+    - data: The data drawn, hashed for the cache key
+    - figsize (tuple): The size of the figure in inches
+    - fmt (str): "png" or "svg"
+    Returns:
+    - bytes: The rendered image
+    """
+    key = data_hash(draw.__module__, draw.__qualname__, figsize, fmt, *data)
+    cached = _cache_get(_figure_cache, key)
+    if cached is not None:
+        return cached
+
+    # A bare Figure is never registered with pyplot, so nothing accumulates between reruns
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=figsize)
+    draw(fig, *data)
+    image = io.BytesIO()
+    fig.savefig(image, format=fmt, bbox_inches="tight")
+    fig.clear()
+
+    return _cache_put(_figure_cache, key, image.getvalue(), FIGURE_CACHE_SIZE)
+
+def show_figure(draw, *data, figsize=(8, 5)):
+    """
+    Display a figure in Streamlit, rendered once per distinct data, see render_figure
+    Parameters:
+    - draw (callable): Draws on a matplotlib Figure, called as draw(fig, *data)
+    - data: The data drawn
+    - figsize (tuple): The size of the figure in inches
+    Returns:
+    - None: Displays the image using Streamlit
+    """
+    st.image(render_figure(draw, *data, figsize=figsize), use_container_width=True)
 
-def plot_sentiment_histograms(polarities, subjectivities):
+def render_word_cloud(term_counts, width=800, height=400, max_words=50, base_color=None, highlight_color=None,
+                      highlight_words=()):
     """
-    Generate and display histograms for polarity and subjectivity distributions
+    Render a word cloud from term counts as PNG bytes, cached by a hash of the counts and parameters
     Parameters:
-    - polarities (list): List of polarity scores for the articles
-    - subjectivities (list): List of subjectivity scores for the articles
+    - term_counts (dict): The count of every term
+    - width (int), height (int): The size of the image in pixels
+    - max_words (int): The number of most frequent terms drawn
+    - base_color (str): The color of the words, None uses the default colormap
+    - highlight_color (str): The color of the highlighted words
+    - highlight_words (set): Words drawn in highlight_color instead of base_color
     Returns:
-    - None: Displays the histograms using Streamlit
+    - bytes: The PNG image of the word cloud
     """
-    sns.set_style("whitegrid") 
+    from wordcloud import WordCloud
+    # Only the most frequent terms are drawn, so they alone decide the image and the cache key
+    top_terms = dict(Counter(term_counts).most_common(max_words))
+    highlighted = sorted(word for word in top_terms if word in highlight_words)
+    key = hashlib.sha1(json.dumps([sorted(top_terms.items()), width, height, max_words, base_color,
+                                   highlight_color, highlighted]).encode("utf-8")).hexdigest()
+    cached = _cache_get(_word_cloud_cache, key)
+    if cached is not None:
+        return cached
+
+    color_func = None
+    if base_color is not None:
+        highlighted = set(highlighted)
+
+        def color_func(word, *args, **kwargs):
+            return highlight_color if word in highlighted else base_color
+
+    # Draw from the counts directly, without joining and re-tokenizing the corpus
+    wordcloud = WordCloud(width=width, height=height, background_color='white', max_words=max_words,
+                          color_func=color_func).generate_from_frequencies(top_terms)
+    png = io.BytesIO()
+    wordcloud.to_image().save(png, format="PNG")
+
+    return _cache_put(_word_cloud_cache, key, png.getvalue(), WORD_CLOUD_CACHE_SIZE)
+
+def plot_word_cloud(term_counts):
+    """
+    Generate and display a word cloud from the term counts of a set of articles
+    Parameters:
+    - term_counts (dict): The count of every term in the articles
+    Returns:
+    - None: Displays the word cloud using Streamlit
+    """
+    # Make sure that term_counts is not empty
+    if not term_counts:
+        print("No terms available to generate word cloud.")
+        return
+
+    st.image(render_word_cloud(term_counts), use_container_width=True)
+
 
-    fig, axes = plt.subplots(2, 1, figsize=(10, 8), gridspec_kw={'hspace': 0.4}) 
+
+def _draw_sentiment_histograms(fig, polarities, subjectivities):
+    import seaborn as sns
+    with sns.axes_style("whitegrid"):
+        axes = fig.subplots(2, 1, gridspec_kw={'hspace': 0.4})
 
     # Polarity Histogram
     sns.histplot(polarities, bins=20, color='royalblue', alpha=0.7, edgecolor='black', ax=axes[0])
@@ -65,35 +181,28 @@ def plot_sentiment_histograms(polarities, subjectivities):
     axes[1].set_xticks([0, 0.25, 0.5, 0.75, 1])
     axes[1].set_xticklabels(["Objective", "0.25", "0.5", "0.75", "Subjective"], fontsize=11)
 
-    plt.tight_layout()  
-    st.pyplot(plt)
-
-
-
-
-def plot_sentiment_table(article_titles, polarities, subjectivities, polarity_classes, subjectivity_classes):
+def plot_sentiment_histograms(polarities, subjectivities):
     """
-    Create and display a table with article titles, sentiment scores, and sentiment classifications
+    Generate and display histograms for polarity and subjectivity distributions
     Parameters:
-    - article_titles (list): List of article titles
-    - polarities (list): List of polarity scores
-    - subjectivities (list): List of subjectivity scores
-    - polarity_classes (list): List of classifications for polarity
-    - subjectivity_classes (list): List of classifications for subjectivity
+    - polarities (list): List of polarity scores for the articles
+    - subjectivities (list): List of subjectivity scores for the articles
     Returns:
-    - None: Displays the table using Streamlit
+    - None: Displays the histograms using Streamlit
     """
-    # Combine data into a list of rows for the table
-    table_data = list(zip(article_titles, polarities, subjectivities, polarity_classes, subjectivity_classes))
+    # Redrawn only when the scores change
+    show_figure(_draw_sentiment_histograms, polarities, subjectivities, figsize=(10, 8))
+
+
+TABLE_COLUMNS = ["Article Title", "Polarity Score", "Polarity", "Subjectivity Score", "Subjectivity"]
 
-    fig, ax = plt.subplots(figsize=(15, len(article_titles) * 0.4)) 
+def _draw_sentiment_table(fig, table_data):
+    ax = fig.subplots()
     ax.axis('tight')
     ax.axis('off')
 
     # Create the table
-    table = ax.table(cellText=table_data,
-                     colLabels=["Article Title", "Polarity Score", "Polarity", "Subjectivity Score", "Subjectivity",],
-                     loc='center')
+    table = ax.table(cellText=table_data, colLabels=TABLE_COLUMNS, loc='center')
     table.auto_set_font_size(False)
     table.set_fontsize(12)
     table.scale(1, 1.5)
@@ -115,4 +224,30 @@ def plot_sentiment_table(article_titles, polarities, subjectivities, polarity_cl
         table.auto_set_column_width([i])  
         table.get_celld()[(0, i)].set_width(width) 
 
-    st.pyplot(plt)
\ No newline at end of file
+def plot_sentiment_table(article_titles, polarities, subjectivities, polarity_classes, subjectivity_classes):
+    """
+    Create and display a table with article titles, sentiment scores, and sentiment classifications
+    Parameters:
+    - article_titles (list): List of article titles
+    - polarities (list): List of polarity scores
+    - subjectivities (list): List of subjectivity scores
+    - polarity_classes (list): List of classifications for polarity
+    - subjectivity_classes (list): List of classifications for subjectivity
+    Returns:
+    - None: Displays the table using Streamlit
+    """
+    # The table is built from the columns as they are, rows are only materialized for what is shown
+    columns = (article_titles, polarities, subjectivities, polarity_classes, subjectivity_classes)
+    table = pd.DataFrame({name: pd.Series(column).reset_index(drop=True)
+                          for name, column in zip(TABLE_COLUMNS, columns)})
+
+    # A drawn table grows with every row, long ones are paged through as a dataframe instead
+    if len(table) > TABLE_FIGURE_MAX_ROWS:
+        pages = (len(table) - 1) // TABLE_PAGE_SIZE + 1
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+        start = (page - 1) * TABLE_PAGE_SIZE
+        st.dataframe(table.iloc[start:start + TABLE_PAGE_SIZE], hide_index=True, use_container_width=True)
+        return
+
+    table_data = list(table.itertuples(index=False, name=None))
+    show_figure(_draw_sentiment_table, table_data, figsize=(15, max(len(table_data), 1) * 0.4))
@@ -1,11 +1,8 @@
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-nltk.download('stopwords')
-nltk.download('wordnet')
-
-STOPWORDS = set(stopwords.words("english"))
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pipeline.resources import require
 
 # add custom stopwords 
 CUSTOM_STOPWORDS = {"fullscreen", "image", "ago" , "cet", "US", "said", "view"}
@@ -16,33 +13,74 @@ NUMBERS_AS_WORDS = {
     "seventeen", "eighteen", "nineteen", "twenty", "thirty", "forty", "fifty",
     "sixty", "seventy", "eighty", "ninety", "hundred", "thousand", "million", "billion"
 }
-STOPWORDS.update(word.lower() for word in CUSTOM_STOPWORDS)
-STOPWORDS.update(NUMBERS_AS_WORDS)
-lemmatizer = WordNetLemmatizer()
+
+# Patterns compiled once instead of on every call
+CURLY_QUOTES = str.maketrans("’", "'")
+POSSESSIVE_PATTERN = re.compile(r"\b(\w+)'s\b")
+SPECIAL_CHARACTERS_PATTERN = re.compile(r'[^\w\s]')
+
+# Distinct tokens remembered by the lemma cache, a long corpus repeats the same words over and over
+LEMMA_CACHE_SIZE = 100_000
+
+# Batches smaller than this are preprocessed in-process, a process pool costs more than it saves
+MIN_PARALLEL_BATCH = 200
+
+@lru_cache(maxsize=None)
+def get_stopwords():
+    """Load the NLTK English stopwords plus the custom ones, on first use."""
+    require("stopwords")
+    from nltk.corpus import stopwords
+    words = set(stopwords.words("english"))
+    words.update(word.lower() for word in CUSTOM_STOPWORDS)
+    words.update(NUMBERS_AS_WORDS)
+    return frozenset(words)
+
+@lru_cache(maxsize=None)
+def get_lemmatizer():
+    """Load the WordNet lemmatizer on first use."""
+    require("wordnet")
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
 
 def clean_text(text):
     """Lowercase text, remove special characters"""
     text = text.lower()
-    text = text.replace("’", "'")  # Normalize curly quotes
-    text = re.sub(r"\b(\w+)'s\b", r"\1", text)  # Remove possessive 's'
-    text = re.sub(r'[^\w\s]', '', text)
+    text = text.translate(CURLY_QUOTES)  # Normalize curly quotes
+    text = POSSESSIVE_PATTERN.sub(r"\1", text)  # Remove possessive 's'
+    text = SPECIAL_CHARACTERS_PATTERN.sub('', text)
     return text.strip()
 
 def remove_stopwords(text):
     """Remove predefined and custom stopwords."""
     words = text.split()
-    filtered_words = [word for word in words if word not in STOPWORDS and len(word) > 1]
+    stopwords = get_stopwords()
+    filtered_words = [word for word in words if word not in stopwords and len(word) > 1]
     return " ".join(filtered_words)
 
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize_word(word):
+    """Lemmatize a single word, memoized so repeated tokens skip the WordNet lookup."""
+    return get_lemmatizer().lemmatize(word)
+
 def lemmatize_text(text):
     """Lemmatize words in the text."""
     words = text.split()
-    lemmatized_words = [lemmatizer.lemmatize(word) for word in words]
+    lemmatized_words = [lemmatize_word(word) for word in words]
     return " ".join(lemmatized_words)
 
 def preprocess_text(text):
     """Apply all preprocessing steps in the correct order."""
-    text = clean_text(text)
-    text = remove_stopwords(text)
-    text = lemmatize_text(text)
-    return text if text else None
\ No newline at end of file
+    # Stopword removal and lemmatization share one pass over the tokens instead of splitting and joining twice
+    words = clean_text(text).split()
+    stopwords = get_stopwords()
+    text = " ".join([lemmatize_word(word) for word in words if word not in stopwords and len(word) > 1])
+    return text if text else None
+
+def preprocess_many(texts, workers=None, chunksize=16):
+    """Preprocess many texts, spread over a process pool for large batches."""
+    texts = list(texts)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(texts) < MIN_PARALLEL_BATCH:
+        return [preprocess_text(text) for text in texts]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(preprocess_text, texts, chunksize=chunksize))
\ No newline at end of file
@@ -0,0 +1,42 @@
+import streamlit as st
+from pipeline.nlp import POLARITY_LABELS, SUBJECTIVITY_LABELS
+from pipeline.search import SEARCH_PAGE_SIZE, count_matches, facet_counts, search_articles
+
+
+def _with_count(counts):
+    # Label every class of a filter with the number of matching articles in it
+    return lambda label: f"{label} ({counts.get(label, 0)})"
+
+
+def display_search(store, subject_names):
+    """
+    Show a search box and sentiment filters over the stored articles, with the matching articles page by page
+    Parameters:
+    - store (sqlite3.Connection): The article store, queried through its full-text index
+    - subject_names (list): The subjects that can be filtered on
+    Returns:
+    - None: Displays the search view using Streamlit
+    """
+    query = st.text_input("Search the titles and texts", placeholder="e.g. border policy")
+    subjects = st.multiselect("Subjects", subject_names)
+
+    # The class counts follow the words and subjects searched for
+    facets = facet_counts(store, query, subjects)
+    col1, col2 = st.columns(2)
+    polarity_classes = col1.multiselect("Polarity", POLARITY_LABELS,
+                                        format_func=_with_count(facets["polarity_class"]))
+    subjectivity_classes = col2.multiselect("Subjectivity", SUBJECTIVITY_LABELS,
+                                            format_func=_with_count(facets["subjectivity_class"]))
+
+    total = count_matches(store, query, subjects, polarity_classes, subjectivity_classes)
+    if not total:
+        st.info("No article matches the search.")
+        return
+    pages = (total - 1) // SEARCH_PAGE_SIZE + 1
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="search_page")
+    st.caption(f"{total} matching articles")
+
+    # Only the articles of the page are read from the store
+    results = search_articles(store, query, subjects, polarity_classes, subjectivity_classes, page=page)
+    st.dataframe(results.round({"polarity": 3, "subjectivity": 3}), hide_index=True, use_container_width=True,
+                 column_config={"url": st.column_config.LinkColumn("Link")})
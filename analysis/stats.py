@@ -0,0 +1,87 @@
+import numpy as np
+
+# Value ranges of the scores, shared by the histograms of every subject
+SCORE_RANGES = {"polarity": (-1.0, 1.0), "subjectivity": (0.0, 1.0)}
+
+
+def box_stats(values, whis=1.5):
+    """
+    Compute the statistics drawn by a boxplot, in the format of matplotlib's Axes.bxp
+    Parameters:
+    - values (np.ndarray): The scores of one subject
+    - whis (float): The whisker reach as a multiple of the interquartile range
+    Returns:
+    - dict: The median, quartiles, whisker ends and outliers
+    """
+    q1, med, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    # Whiskers end at the most extreme scores still within whis * IQR of the box
+    inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+    return {
+        "med": med, "q1": q1, "q3": q3,
+        "whislo": inside.min(), "whishi": inside.max(),
+        "fliers": values[(values < inside.min()) | (values > inside.max())],
+        "mean": values.mean(),
+    }
+
+
+def kde_grid(values, grid_size=256, cut=3):
+    """
+    Estimate a Gaussian kernel density on a regular grid by binning, in O(n + grid_size)
+    Parameters:
+    - values (np.ndarray): The scores of one subject
+    - grid_size (int): The number of grid points
+    - cut (float): How many bandwidths the grid extends past the extreme scores
+    Returns:
+    - tuple: The grid points and the density at each of them
+    """
+    # Scott's rule, the default bandwidth of seaborn's kdeplot
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5) if len(values) > 1 else 0.0
+    if not bandwidth > 0:
+        bandwidth = 1e-3
+    grid = np.linspace(values.min() - cut * bandwidth, values.max() + cut * bandwidth, grid_size)
+    step = grid[1] - grid[0]
+
+    # Bin the scores onto the grid, then smooth the counts with the Gaussian kernel
+    counts = np.bincount(np.rint((values - grid[0]) / step).astype(int), minlength=grid_size)[:grid_size]
+    offsets = np.arange(-(grid_size - 1), grid_size) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel)[grid_size - 1:2 * grid_size - 1]
+    density = density / (density.sum() * step)
+    return grid, density
+
+
+def summarize_scores(scores, bins=20):
+    """
+    Pre-aggregate the sentiment scores of every subject for the comparison plots
+    Parameters:
+    - scores (pd.DataFrame): One row per article with subject, polarity and subjectivity columns, and
+      optionally cross_listed
+    - bins (int): The number of histogram bins
+    Returns:
+    - dict: Per-subject counts, means, quantiles, boxplot statistics, histograms and KDE grids, and the
+      number of cross-listed articles when known
+    """
+    # Group once, subjects keep the order of their categories
+    grouped = scores.groupby("subject", observed=True)
+    groups = dict(iter(grouped))
+    summary = {
+        "subjects": list(groups),
+        "counts": grouped.size(),
+        "means": grouped[list(SCORE_RANGES)].mean(),
+        "quantiles": grouped[list(SCORE_RANGES)].quantile([0.05, 0.25, 0.5, 0.75, 0.95]),
+        "box": {}, "histograms": {}, "kde": {},
+    }
+    if "cross_listed" in scores:
+        summary["cross_listed"] = grouped["cross_listed"].sum()
+    for column, value_range in SCORE_RANGES.items():
+        edges = np.linspace(*value_range, bins + 1)
+        summary["histograms"][column] = {"edges": edges}
+        summary["box"][column] = {}
+        summary["kde"][column] = {}
+        for name, group in groups.items():
+            values = group[column].to_numpy(dtype=float)
+            summary["histograms"][column][name] = np.histogram(values, bins=edges)[0]
+            summary["box"][column][name] = box_stats(values)
+            summary["kde"][column][name] = kde_grid(values)
+    return summary
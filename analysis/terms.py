@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Terms used fewer times than this across all the subjects are never distinctive
+MIN_TERM_COUNT = 5
+# A term is distinctive of a subject when its log-odds z-score against the other subjects is above this
+Z_THRESHOLD = 1.96
+# The most distinctive terms kept per subject
+TOP_TERMS = 100
+
+
+def term_matrix(term_counts):
+    """
+    Build a sparse subject-term count matrix from the term counts of every subject
+    Parameters:
+    - term_counts (dict): The count of every term, keyed by subject name
+    Returns:
+    - tuple: The vocabulary (term of every term id) and the row (subject id), column (term id) and count of
+      every non-zero entry, subjects numbered in the order of term_counts
+    """
+    sizes = [len(counts) for counts in term_counts.values()]
+    terms = np.fromiter((term for counts in term_counts.values() for term in counts), dtype=object,
+                        count=sum(sizes))
+    counts = np.fromiter((count for counts in term_counts.values() for count in counts.values()), dtype=np.int64,
+                         count=sum(sizes))
+    # One hash-based pass assigns the vocabulary ids
+    cols, vocabulary = pd.factorize(terms)
+    rows = np.repeat(np.arange(len(sizes)), sizes)
+    return vocabulary, rows, cols, counts
+
+
+def log_odds(rows, cols, counts, n_subjects, n_terms):
+    """
+    Score every term of every subject against the other subjects, as the z-score of the log-odds ratio with an
+    informative Dirichlet prior (Monroe, Colaresi and Quinn, 2008) taken from the pooled counts
+    Parameters:
+    - rows, cols, counts (np.ndarray): The non-zero entries returned by term_matrix
+    - n_subjects (int): The number of subjects
+    - n_terms (int): The size of the vocabulary
+    Returns:
+    - np.ndarray: One row of z-scores per subject, positive for terms used more than by the other subjects
+    """
+    # Only the subject rows are dense, the vocabulary dimension comes from the sparse entries
+    matrix = np.bincount(rows * n_terms + cols, weights=counts, minlength=n_subjects * n_terms)
+    matrix = matrix.reshape(n_subjects, n_terms)
+    prior = matrix.sum(axis=0)
+    prior_total = prior.sum()
+
+    own = matrix
+    own_total = own.sum(axis=1, keepdims=True)
+    other = prior - own
+    other_total = prior_total - own_total
+    delta = (np.log(own + prior) - np.log(own_total + prior_total - own - prior)
+             - np.log(other + prior) + np.log(other_total + prior_total - other - prior))
+    variance = 1 / (own + prior) + 1 / (other + prior)
+    return delta / np.sqrt(variance)
+
+
+def distinctive_terms(term_counts, min_count=MIN_TERM_COUNT, z_threshold=Z_THRESHOLD, limit=TOP_TERMS):
+    """
+    Find the terms each subject uses markedly more than the others
+    Parameters:
+    - term_counts (dict): The count of every term, keyed by subject name
+    - min_count (int): The minimum count of a term in the subject, and across all the subjects
+    - z_threshold (float): The minimum log-odds z-score of a distinctive term
+    - limit (int): The maximum number of terms returned per subject
+    Returns:
+    - dict: For every subject, a pd.Series of the z-scores of its distinctive terms, most distinctive first
+    """
+    names = list(term_counts)
+    vocabulary, rows, cols, counts = term_matrix(term_counts)
+    z_scores = log_odds(rows, cols, counts, len(names), len(vocabulary))
+
+    own = np.zeros_like(z_scores)
+    own[rows, cols] = counts
+    # Rare terms have unstable log-odds, and a single stray use by another subject does not hide a term
+    eligible = (own >= min_count) & (own.sum(axis=0) >= min_count) & (z_scores > z_threshold)
+
+    distinctive = {}
+    for i, name in enumerate(names):
+        ids = np.flatnonzero(eligible[i])
+        top = ids[np.argsort(-z_scores[i, ids], kind="stable")[:limit]]
+        distinctive[name] = pd.Series(z_scores[i, top], index=vocabulary[top], name=name)
+    return distinctive
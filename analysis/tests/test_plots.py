@@ -0,0 +1,38 @@
+import pandas as pd
+
+from analysis import plots
+
+
+def draw_line(fig, values):
+    fig.subplots().plot(values)
+
+
+def test_render_figure_is_cached_by_data():
+    calls = []
+
+    def draw(fig, values):
+        calls.append(values)
+        draw_line(fig, values)
+
+    first = plots.render_figure(draw, pd.Series([1.0, 2.0, 3.0]))
+    again = plots.render_figure(draw, pd.Series([1.0, 2.0, 3.0]))
+    other = plots.render_figure(draw, pd.Series([1.0, 2.0, 4.0]))
+
+    assert first.startswith(b"\x89PNG") and again == first and other != first
+    assert len(calls) == 2
+
+
+def test_render_figure_keeps_no_pyplot_figures():
+    import matplotlib.pyplot as plt
+    for i in range(plots.FIGURE_CACHE_SIZE + 5):
+        plots.render_figure(draw_line, [i, i + 1])
+    assert plt.get_fignums() == []
+    assert len(plots._figure_cache) == plots.FIGURE_CACHE_SIZE
+
+
+def test_render_figure_cache_is_safe_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        images = list(executor.map(lambda i: plots.render_figure(draw_line, [i % 70, 1]), range(200)))
+    assert all(image.startswith(b"\x89PNG") for image in images)
+    assert len(plots._figure_cache) <= plots.FIGURE_CACHE_SIZE
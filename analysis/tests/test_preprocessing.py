@@ -1,4 +1,4 @@
-from analysis.preprocessing import clean_text, remove_stopwords,lemmatize_text,preprocess_text
+from analysis.preprocessing import clean_text, remove_stopwords,lemmatize_text,preprocess_text,preprocess_many
 
 def test_clean_text():
     assert clean_text("Donald's dog") == "donald dog"
@@ -24,4 +24,9 @@ def test_preprocess_text():
     assert preprocess_text(" donald u") == "donald" 
     assert preprocess_text("s") is None
     assert preprocess_text("ago cet") is None
-    assert preprocess_text("US's") is None
\ No newline at end of file
+    assert preprocess_text("US's") is None
+
+def test_preprocess_many():
+    texts = ["walk the dog", "Donald's dog", "s", "These are just some tests!"] * 100
+    assert preprocess_many(texts, workers=2) == [preprocess_text(text) for text in texts]
+    assert preprocess_many(texts[:4]) == ["walk dog", "donald dog", None, "test"]
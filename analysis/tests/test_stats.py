@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from analysis.stats import box_stats, kde_grid, summarize_scores
+
+
+def test_box_stats_match_quantiles():
+    values = np.array([-1.0, 0.0, 0.1, 0.2, 0.3, 0.4, 1.0])
+    stats = box_stats(values)
+    assert stats["med"] == 0.2
+    assert (stats["q1"], stats["q3"]) == tuple(np.quantile(values, [0.25, 0.75]))
+    assert (stats["whislo"], stats["whishi"]) == (0.0, 0.4)
+    assert list(stats["fliers"]) == [-1.0, 1.0]
+
+
+def test_kde_grid_matches_exact_density():
+    values = np.random.default_rng(0).normal(0.5, 0.1, 2000)
+    grid, density = kde_grid(values)
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    exact = np.exp(-0.5 * ((grid[:, None] - values) / bandwidth) ** 2).sum(axis=1)
+    exact /= len(values) * bandwidth * np.sqrt(2 * np.pi)
+    assert abs(density.sum() * (grid[1] - grid[0]) - 1) < 1e-9
+    assert np.abs(density - exact).max() < 0.02 * exact.max()
+
+
+def test_summarize_scores_groups_by_subject():
+    scores = pd.DataFrame({"subject": pd.Categorical(["Trump", "Harris", "Trump"], categories=["Trump", "Harris"]),
+                           "polarity": [0.1, -0.2, 0.3], "subjectivity": [0.4, 0.5, 0.6]})
+    summary = summarize_scores(scores, bins=4)
+    assert summary["subjects"] == ["Trump", "Harris"]
+    assert summary["means"].loc["Trump", "polarity"] == 0.2
+    assert list(summary["histograms"]["polarity"]["Harris"]) == [0, 1, 0, 0]
+    assert summary["histograms"]["subjectivity"]["Trump"].sum() == 2
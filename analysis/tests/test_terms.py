@@ -0,0 +1,32 @@
+import numpy as np
+
+from analysis.terms import distinctive_terms, log_odds, term_matrix
+
+
+def test_log_odds_matches_per_term_formula():
+    term_counts = {"Trump": {"rally": 30, "vote": 20, "court": 8}, "Harris": {"vote": 25, "border": 12, "court": 1}}
+    vocabulary, rows, cols, counts = term_matrix(term_counts)
+    z_scores = log_odds(rows, cols, counts, 2, len(vocabulary))
+
+    # Direct computation for "court", used 8 times by Trump and once by Harris
+    prior, prior_total = 9, 96
+    own, own_total, other, other_total = 8, 58, 1, 38
+    delta = (np.log((own + prior) / (own_total + prior_total - own - prior))
+             - np.log((other + prior) / (other_total + prior_total - other - prior)))
+    expected = delta / np.sqrt(1 / (own + prior) + 1 / (other + prior))
+    assert np.isclose(z_scores[0, list(vocabulary).index("court")], expected)
+    assert np.isclose(z_scores[1, list(vocabulary).index("court")], -expected)
+
+
+def test_distinctive_terms_ignore_stray_and_rare_terms():
+    shared = {f"word{i}": 50 for i in range(50)}
+    term_counts = {
+        # "tariff" is used once by Harris, a set difference would not highlight it for Trump
+        "Trump": {**shared, "tariff": 120, "typo": 1},
+        "Harris": {**shared, "tariff": 1, "childcare": 90},
+    }
+    distinctive = distinctive_terms(term_counts)
+
+    assert list(distinctive["Trump"].index) == ["tariff"]
+    assert list(distinctive["Harris"].index) == ["childcare"]
+    assert distinctive_terms(term_counts, limit=0)["Trump"].empty
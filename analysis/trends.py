@@ -0,0 +1,99 @@
+import numpy as np
+import streamlit as st
+from analysis.plots import show_figure
+from pipeline.nlp import POLARITY_LABELS
+
+
+def _draw_score_trend(fig, trend, score, colors):
+    ax = fig.subplots()
+    for name, group in trend.groupby("subject", observed=True):
+        mean = group[f"{score}_mean"]
+        std = np.sqrt(group[f"{score}_var"])
+        ax.plot(group["bucket"], mean, marker="o", label=name, color=colors[name])
+        ax.fill_between(group["bucket"], mean - std, mean + std, alpha=0.2, color=colors[name])
+    ax.set_title(f"Average {score.capitalize()} Over Time")
+    ax.set_ylabel(score.capitalize())
+    ax.legend()
+    fig.autofmt_xdate()
+
+
+def plot_score_trend(rollups, score, colors):
+    """
+    Plot the mean of a sentiment score over time, with a band of one standard deviation
+    Parameters:
+    - rollups (pd.DataFrame): The rollups returned by load_rollups
+    - score (str): "polarity" or "subjectivity"
+    - colors (dict): Plot color of each subject
+    Returns:
+    - None: Displays the line chart using Streamlit
+    """
+    trend = rollups[["subject", "bucket", f"{score}_mean", f"{score}_var"]]
+    show_figure(_draw_score_trend, trend, score, colors, figsize=(10, 5))
+
+
+def _draw_bars(fig, df, title, colors=None, stacked=False):
+    ax = fig.subplots()
+    if colors is None:
+        df.plot(kind="bar", stacked=stacked, ax=ax, colormap="coolwarm_r")
+        ax.legend(loc="center left", bbox_to_anchor=(1, 0.5))
+    else:
+        df.plot(kind="bar", stacked=stacked, ax=ax, color=[colors[name] for name in df.columns])
+    ax.set_xticklabels([bucket.strftime("%Y-%m-%d") for bucket in df.index])
+    ax.set_title(title)
+    ax.set_xlabel("")
+    fig.autofmt_xdate()
+
+
+def plot_article_counts(rollups, colors):
+    """
+    Plot the number of articles of each subject per time bucket
+    Parameters:
+    - rollups (pd.DataFrame): The rollups returned by load_rollups
+    - colors (dict): Plot color of each subject
+    Returns:
+    - None: Displays the bar chart using Streamlit
+    """
+    counts = rollups.pivot_table(index="bucket", columns="subject", values="count", observed=True, fill_value=0)
+    show_figure(_draw_bars, counts, "Articles Over Time", colors, figsize=(10, 4))
+
+
+def plot_polarity_classes(rollups, subject):
+    """
+    Plot the share of each polarity class of a subject per time bucket
+    Parameters:
+    - rollups (pd.DataFrame): The rollups returned by load_rollups
+    - subject (str): The name of the subject
+    Returns:
+    - None: Displays the stacked bar chart using Streamlit
+    """
+    group = rollups[rollups["subject"] == subject].set_index("bucket")
+    classes = group[[label for label in POLARITY_LABELS if label in group.columns]]
+    shares = classes.div(group["count"], axis=0)
+    show_figure(_draw_bars, shares, f"{subject} Polarity Classes Over Time", None, True, figsize=(10, 4))
+
+
+def display_trends(rollups, colors):
+    """
+    Display how the sentiment of every subject moves over time in Streamlit
+    Parameters:
+    - rollups (pd.DataFrame): The daily or weekly rollups returned by load_rollups
+    - colors (dict): Plot color of each subject
+    Returns:
+    - None: Displays the trend charts using Streamlit
+    """
+    if rollups.empty:
+        st.info("No dated articles yet.")
+        return
+
+    st.subheader("Polarity Over Time")
+    plot_score_trend(rollups, "polarity", colors)
+
+    st.subheader("Subjectivity Over Time")
+    plot_score_trend(rollups, "subjectivity", colors)
+
+    st.subheader("Articles Over Time")
+    plot_article_counts(rollups, colors)
+
+    for name in rollups["subject"].unique().dropna():
+        st.subheader(f"{name} Polarity Classes")
+        plot_polarity_classes(rollups, name)
@@ -0,0 +1,110 @@
+"""
+Measure the cold start of the dashboard, the pipeline modules and the test suite, each in a fresh interpreter
+
+Usage: python -m benchmarks.cold_start [--runs 5]
+
+The dashboard is run once through Streamlit's AppTest against a store built from the fixtures in
+benchmarks/fixtures, so it renders its first page instead of stopping at the empty store warning.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from pipeline.ingest import ingest_results
+from pipeline.nlp import article, score_batch
+from pipeline.store import open_store, save_subject
+from pipeline.subjects import load_subjects
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# A script run outside Streamlit does not halt at st.stop(), so the dashboard is run the way Streamlit runs it
+RUN_DASHBOARD = ("from streamlit.testing.v1 import AppTest\n"
+                 "app = AppTest.from_file('main.py', default_timeout=300).run()\n"
+                 "if app.exception:\n"
+                 "    raise SystemExit(app.exception[0].message)")
+
+# Each target runs in a new Python process, so nothing is imported or cached from a previous run
+TARGETS = {
+    "import analysis.preprocessing": [sys.executable, "-c", "import analysis.preprocessing"],
+    "import pipeline.nlp": [sys.executable, "-c", "import pipeline.nlp"],
+    "import analysis.plots": [sys.executable, "-c", "import analysis.plots"],
+    "run main": [sys.executable, "-c", RUN_DASHBOARD],
+    "pytest pipeline": [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "pipeline"],
+}
+
+
+def make_fixture_store(path):
+    """
+    Build an article store the dashboard can render, from the recorded API page scored for every subject
+    Parameters:
+    - path (str): The SQLite file of the store
+    Returns:
+    - None
+    """
+    with open(os.path.join(FIXTURES_DIR, "guardian_page.json"), encoding="utf-8") as f:
+        recorded = json.load(f)["response"]["results"]
+    store = open_store(path)
+    for subject in load_subjects():
+        results = [{**result, "webUrl": f"{result['webUrl']}?subject={subject['name']}"} for result in recorded]
+        # Lowercased text stands in for the preprocessed tokens, which need the NLTK data
+        records = ingest_results(results, article, score_batch, lambda texts: [text.lower() for text in texts],
+                                 store=store)
+        save_subject(store, subject["name"], records, newest=results[0])
+    store.close()
+
+
+def time_command(command, runs, env=None):
+    """
+    Run a command several times
+    Parameters:
+    - command (list): The command and its arguments
+    - runs (int): The number of runs
+    - env (dict): The environment of the command, this process's by default
+    Returns:
+    - tuple: The wall-clock seconds of every run, and the last line of the error output of the first failed
+      run (None when every run succeeded)
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=env)
+        timings.append(time.perf_counter() - start)
+        if run.returncode != 0:
+            lines = run.stderr.strip().splitlines()
+            return timings, f"exit code {run.returncode}" + (f": {lines[-1]}" if lines else "")
+    return timings, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the dashboard and the test suite")
+    parser.add_argument("--runs", type=int, default=5, help="runs per target, the median is reported")
+    parser.add_argument("targets", nargs="*", default=list(TARGETS), help="targets to run, all by default")
+    args = parser.parse_args(argv)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {**os.environ, "ARTICLE_STORE": os.path.join(data_dir, "articles.db")}
+        make_fixture_store(env["ARTICLE_STORE"])
+
+        print(f"{'target':<30} {'median s':>9} {'min s':>7}")
+        for target in args.targets:
+            timings, error = time_command(TARGETS[target], args.runs, env=env)
+            if error is not None:
+                # A failed run is not a cold start, it is reported instead of timed
+                failures.append(target)
+                print(f"{target:<30} failed, {error}")
+                continue
+            print(f"{target:<30} {statistics.median(timings):>9.2f} {min(timings):>7.2f}")
+
+    if failures:
+        print(f"\nFailed: {', '.join(failures)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare whole-document and granular sentiment scoring on synthetic articles of growing length
+
+Usage: python -m benchmarks.granular_sentiment [--paragraphs 10 100 1000] [--units document paragraph sentence]
+
+Articles are shaped like Guardian API results: a bodyText running the paragraphs together, scored as a whole,
+and the body HTML the granular units are split from, as refresh.py requests it for them.
+"""
+import argparse
+import time
+import tracemalloc
+
+from pipeline.ingest import paragraph_text
+from pipeline.nlp import granular_sentiment, score_text
+from pipeline.resources import missing_resources
+
+SENTENCES = [
+    "The senator gave a wonderful, inspiring speech to a cheering crowd.",
+    "Critics called the plan a terrible failure that would hurt working families.",
+    "The vote is scheduled for Tuesday afternoon in the capital.",
+    "Polls suggest the race remains extremely close in several swing states.",
+]
+
+
+def make_article(paragraphs, sentences_per_paragraph=4):
+    """
+    Build the fields of a synthetic Guardian API result
+    Parameters:
+    - paragraphs (int): The number of paragraphs
+    - sentences_per_paragraph (int): The number of sentences per paragraph
+    Returns:
+    - dict: The bodyText, without paragraph breaks, and the body HTML, one <p> per paragraph
+    """
+    texts = [" ".join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(sentences_per_paragraph))
+             for i in range(paragraphs)]
+    return {"bodyText": " ".join(texts), "body": "".join(f"<p>{text}</p>" for text in texts)}
+
+
+def measure(score, text):
+    """
+    Time a scoring function and trace its peak memory
+    Parameters:
+    - score (callable): Scores the text
+    - text (str): The article text
+    Returns:
+    - tuple: The elapsed seconds, the peak traced memory in MiB and the scores
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    scores = score(text)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20, scores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark whole-document against granular sentiment scoring")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[10, 100, 1000],
+                        help="article lengths to benchmark, in paragraphs of four sentences")
+    parser.add_argument("--units", nargs="+", default=["document", "paragraph", "sentence"],
+                        choices=["document", "paragraph", "sentence"], help="scoring units to compare")
+    args = parser.parse_args(argv)
+
+    units = args.units
+    if "sentence" in units and missing_resources(["punkt_tab"]):
+        print("Skipping the sentence unit, run `python refresh.py --setup` to install the punkt tokenizer")
+        units = [unit for unit in units if unit != "sentence"]
+
+    # Load the TextBlob models before timing anything
+    score_text(SENTENCES[0])
+
+    print(f"{'paragraphs':>10} {'unit':>10} {'chunks':>7} {'seconds':>9} {'peak MiB':>9}")
+    for paragraphs in args.paragraphs:
+        fields = make_article(paragraphs)
+        for unit in units:
+            if unit == "document":
+                text, score = fields["bodyText"], score_text
+            else:
+                # The paragraphs are taken from the body HTML, bodyText would be a single chunk
+                text = fields["body"]
+
+                def score(body, unit=unit):
+                    return granular_sentiment(paragraph_text(body), unit)
+            elapsed, peak, scores = measure(score, text)
+            chunks = scores["chunks"] if unit != "document" else 1
+            print(f"{paragraphs:>10} {unit:>10} {chunks:>7} {elapsed:>9.3f} {peak:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Benchmark every stage of the scrape -> NLP -> plot pipeline offline, against Guardian fixtures served locally
+
+Usage: python -m benchmarks.pipeline_stages [--sizes 20 1000 10000] [--save] [--check]
+
+The API pages and article pages are built from the fixtures in benchmarks/fixtures and served by a local HTTP
+server, so the numbers do not depend on the network. Peak memory is the peak traced by tracemalloc in this
+process (process pool workers are not traced), and timings include the tracing overhead, so only compare them
+with baselines taken by this script.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from analysis import compare, plots
+from analysis.stats import summarize_scores
+from analysis.terms import distinctive_terms
+from pipeline.fetch import fetch_all
+from pipeline.guardian import iter_results
+from pipeline.http import make_session
+from pipeline.nlp import article, score_batch
+from pipeline.resources import missing_resources
+from pipeline.tests.stub_server import StubServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "pipeline_stages.json")
+SUBJECTS = {"Trump": "red", "Harris": "blue"}
+
+# Every stage run_stages times, a check fails when one of them is missing from the run or from the baseline
+STAGES = ["api", "download", "parse", "score", "preprocess", "terms", "summarize", "plots"]
+
+# A stage is flagged when it is this much slower than its baseline, and by more than MIN_REGRESSION seconds
+REGRESSION_TOLERANCE = 0.25
+MIN_REGRESSION = 0.05
+
+
+def load_fixtures():
+    """
+    Read the recorded API page and article page
+    Returns:
+    - tuple: The API results and the article HTML
+    """
+    with open(os.path.join(FIXTURES_DIR, "guardian_page.json"), encoding="utf-8") as f:
+        results = json.load(f)["response"]["results"]
+    with open(os.path.join(FIXTURES_DIR, "article.html"), encoding="utf-8") as f:
+        html = f.read()
+    return results, html
+
+
+def make_results(size, base_url, seed=0):
+    """
+    Build size API results from the recorded ones, with distinct URLs and shuffled sentences
+    Parameters:
+    - size (int): The number of results
+    - base_url (str): The root of the local server the article pages are served from
+    - seed (int): Seed of the sentence shuffling
+    Returns:
+    - list: The API results
+    """
+    recorded, _ = load_fixtures()
+    sentences = [sentence for result in recorded
+                 for sentence in re.split(r"(?<=\.) ", result["fields"]["bodyText"])]
+    rng = random.Random(seed)
+    results = []
+    for i in range(size):
+        template = recorded[i % len(recorded)]
+        body = " ".join(rng.sample(sentences, rng.randint(6, 10)))
+        results.append({**template, "webUrl": f"{base_url}/us-news/{i}", "id": f"us-news/{i}",
+                        "fields": {**template["fields"], "bodyText": body}})
+    return results
+
+
+def serve_fixtures(server, results, html):
+    """Serve the results as paginated API responses and the article page at every result URL"""
+    def section(path):
+        query = {key: values[0] for key, values in parse_qs(urlsplit(path).query).items()}
+        page, page_size = int(query["page"]), int(query["page-size"])
+        body = {"response": {"status": "ok", "currentPage": page, "pages": -(-len(results) // page_size),
+                             "results": results[(page - 1) * page_size:page * page_size]}}
+        return 200, "application/json", json.dumps(body)
+
+    server.add_page("/us-news", section)
+    page = (200, "text/html", html)
+    for result in results:
+        server.routes[urlsplit(result["webUrl"]).path] = page
+
+
+def run_stages(size, server):
+    """
+    Run every stage on size articles, each one on the output of the previous ones
+    Parameters:
+    - size (int): The number of articles
+    - server (StubServer): The running local server
+    Returns:
+    - dict: The seconds, items per second and peak MiB of every stage
+    """
+    _, html = load_fixtures()
+    serve_fixtures(server, make_results(size, server.base_url), html)
+    session = make_session()
+    data = {}
+    timings = {}
+
+    def stage(name, items, run):
+        tracemalloc.start()
+        start = time.perf_counter()
+        data[name] = run()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        timings[name] = {"seconds": seconds, "per_sec": items / seconds if seconds > 0 else float("inf"),
+                         "peak_mib": peak}
+
+    stage("api", size, lambda: list(iter_results("test", "us-news", session=session, page_size=200,
+                                                  base_url=server.base_url)))
+    urls = [result["webUrl"] for result in data["api"]]
+    stage("download", size, lambda: fetch_all(urls, lambda url, page: page, min_interval=0, session=session))
+    stage("parse", size, lambda: [article(url, page) for url, page in zip(urls, data["download"])])
+
+    texts = [result["fields"]["bodyText"] for result in data["api"]]
+    stage("score", size, lambda: score_batch(texts))
+
+    if missing_resources(["stopwords", "wordnet"]):
+        print("Skipping the preprocess stage, run `python refresh.py --setup` to install the NLTK data")
+        tokens = [text.lower() for text in texts]
+    else:
+        from analysis.preprocessing import preprocess_many
+        stage("preprocess", size, lambda: preprocess_many(texts))
+        tokens = [article_tokens or "" for article_tokens in data["preprocess"]]
+
+    # Articles alternate between the two subjects
+    names = list(SUBJECTS)
+    subjects = [names[i % len(names)] for i in range(size)]
+
+    def term_counts():
+        counts = {name: Counter() for name in names}
+        for name, article_tokens in zip(subjects, tokens):
+            counts[name].update(article_tokens.split())
+        return counts, distinctive_terms(counts)
+
+    stage("terms", size, term_counts)
+
+    scores = data["score"].assign(subject=pd.Categorical(subjects, categories=names))
+    stage("summarize", size, lambda: summarize_scores(scores))
+
+    def render():
+        # Start from empty caches so every figure is drawn
+        plots._figure_cache.clear()
+        plots._word_cloud_cache.clear()
+        summary = data["summarize"]
+        counts, distinctive = data["terms"]
+        plots.render_figure(plots._draw_sentiment_histograms, scores["polarity"], scores["subjectivity"],
+                            figsize=(10, 8))
+        plots.render_figure(compare._draw_polarity_boxplot, summary["box"]["polarity"], SUBJECTS)
+        plots.render_figure(compare._draw_subjectivity_kde, summary["kde"]["subjectivity"], SUBJECTS)
+        plots.render_figure(compare._draw_average_sentiment, summary["means"])
+        for name in names:
+            compare.generate_wordcloud(counts[name], "black", SUBJECTS[name],
+                                       highlight_words=set(distinctive[name].index))
+
+    stage("plots", 1, render)
+    return timings
+
+
+def compare_with_baseline(size, timings, baseline):
+    """
+    Print the timings of one size next to its baseline
+    Parameters:
+    - size (int): The number of articles
+    - timings (dict): The timings returned by run_stages
+    - baseline (dict): The saved timings of every size
+    Returns:
+    - list: The names of the stages slower than their baseline, or that only one of the run and the baseline has
+    """
+    regressions = []
+    saved_stages = baseline.get(str(size), {})
+    print(f"\n{size} articles")
+    print(f"{'stage':<11} {'seconds':>9} {'items/s':>10} {'peak MiB':>9} {'baseline s':>11}")
+    for name, timing in timings.items():
+        saved = saved_stages.get(name)
+        if saved is None:
+            # A stage without a baseline cannot be checked, so it fails the check until one is saved
+            regressions.append(f"{size}/{name} (no baseline)")
+            note = f"{'-':>11}  no baseline"
+        else:
+            note = f"{saved['seconds']:>11.3f}"
+            if (timing["seconds"] > saved["seconds"] * (1 + REGRESSION_TOLERANCE)
+                    and timing["seconds"] - saved["seconds"] > MIN_REGRESSION):
+                regressions.append(f"{size}/{name}")
+                note += "  slower"
+        print(f"{name:<11} {timing['seconds']:>9.3f} {timing['per_sec']:>10.1f} {timing['peak_mib']:>9.1f} {note}")
+
+    # A stage this run skipped, such as preprocess without the NLTK data, is not silently passed
+    for name in STAGES:
+        if name not in timings:
+            regressions.append(f"{size}/{name} (not run)")
+            saved = f"{saved_stages[name]['seconds']:>11.3f}" if name in saved_stages else f"{'-':>11}"
+            print(f"{name:<11} {'-':>9} {'-':>10} {'-':>9} {saved}  not run")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages against local Guardian fixtures")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 1000, 10000], help="numbers of articles")
+    parser.add_argument("--save", action="store_true", help="save the timings as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit with an error when a stage got slower or has no baseline")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    server = StubServer()
+    threading.Thread(target=server.server.serve_forever, daemon=True).start()
+    regressions = []
+    try:
+        for size in args.sizes:
+            timings = run_stages(size, server)
+            regressions += compare_with_baseline(size, timings, baseline)
+            baseline[str(size)] = timings if args.save else baseline.get(str(size), {})
+    finally:
+        server.server.shutdown()
+        server.server.server_close()
+
+    if args.save:
+        # A baseline without every stage would fail every later check, e.g. one saved without the NLTK data
+        skipped = [f"{size}/{name}" for size in args.sizes for name in STAGES if name not in baseline[str(size)]]
+        if skipped:
+            print(f"\nNot saving the baseline, these stages did not run: {', '.join(skipped)}")
+            raise SystemExit(1)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nSaved the baseline to {BASELINE_PATH}")
+    if regressions:
+        print(f"\nSlower than or missing from the baseline: {', '.join(regressions)}")
+        if args.check:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare the throughput of the sentiment backends and how closely they agree with TextBlob on the same corpus
+
+Usage: python -m benchmarks.sentiment_backends [--articles 1000] [--store data/articles.db] [--workers 1]
+
+The corpus is built from the Guardian fixtures, or read from an article store with --store. Every backend scores
+it twice through an in-memory score cache, cold then warm, so the second run measures cache hits.
+"""
+import argparse
+from contextlib import closing
+
+import numpy as np
+
+from benchmarks.pipeline_stages import make_results
+from pipeline.nlp import SENTIMENT_BACKENDS, score_batch
+from pipeline.resources import missing_resources
+from pipeline.store import open_store
+
+
+def load_corpus(articles, store_path=None):
+    """
+    Collect the article bodies to score
+    Parameters:
+    - articles (int): The number of articles
+    - store_path (str): Optional article store to read the bodies from, the fixtures are used otherwise
+    Returns:
+    - list: The article bodies
+    """
+    if store_path is None:
+        return [result["fields"]["bodyText"] for result in make_results(articles, "")]
+    with closing(open_store(store_path)) as store:
+        return [row["content"] for row in store.execute("SELECT content FROM articles LIMIT ?", (articles,))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sentiment backends against each other")
+    parser.add_argument("--articles", type=int, default=1000, help="number of articles scored")
+    parser.add_argument("--store", help="read the articles from this store instead of the fixtures")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes, 1 measures a single core")
+    args = parser.parse_args(argv)
+
+    texts = load_corpus(args.articles, args.store)
+    backends = [backend for backend in SENTIMENT_BACKENDS
+                if backend != "vader" or not missing_resources(["vader_lexicon"])]
+    if len(backends) < len(SENTIMENT_BACKENDS):
+        print("Skipping the vader backend, run `python refresh.py --setup` to install its lexicon")
+
+    cache = open_store(":memory:")
+    results = {}
+    rows = []
+    for backend in backends:
+        cold = score_batch(texts, workers=args.workers, backend=backend, store=cache)
+        warm = score_batch(texts, workers=args.workers, backend=backend, store=cache)
+        results[backend] = cold
+        rows.append((backend, cold.attrs["articles_per_sec"], warm.attrs["articles_per_sec"]))
+
+    reference = results["textblob"]
+    print(f"\n{len(texts)} articles")
+    print(f"{'backend':<10} {'articles/s':>11} {'cached/s':>10} {'corr':>6} {'same class':>11}")
+    for backend, cold_rate, warm_rate in rows:
+        scores = results[backend]
+        # Agreement with the TextBlob numbers the dashboard has shown so far
+        corr = np.corrcoef(scores["polarity"], reference["polarity"])[0, 1] if len(texts) > 1 else float("nan")
+        same = (scores["polarity_class"] == reference["polarity_class"]).mean()
+        print(f"{backend:<10} {cold_rate:>11.1f} {warm_rate:>10.1f} {corr:>6.2f} {same:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,156 @@
-from harris.main_harris import articles_harris
-from trump.main_trump import articles_trump
 from analysis.plots import plot_sentiment_histograms, plot_sentiment_table, plot_word_cloud
 from analysis.compare import display_comparisons
+from analysis.health import display_pipeline_health
+from analysis.search import display_search
+from analysis.stats import summarize_scores
+from analysis.terms import distinctive_terms
+from analysis.trends import display_trends
+from pipeline.store import (last_refreshed, latest_run, load_article_columns, load_body, load_rollups, load_scores,
+                            open_reader, subject_term_counts)
+from pipeline.subjects import load_subjects
+from contextlib import closing
+from datetime import datetime
 import streamlit as st
-import pandas as pd
-from analysis.preprocessing import preprocess_text
+
+
+# Shared by every rerun and session instead of copied, nothing modifies the returned columns
+@st.cache_resource(ttl=60)
+def load_articles(subject_names):
+    """
+    Read the scored articles written by refresh.py, without their texts
+    Parameters:
+    - subject_names (tuple): The names of the subjects to load
+    Returns:
+    - tuple: The compact article columns and the term counts, both keyed by subject name, and the time of the
+      last refresh, None before the first refresh
+    """
+    # The dashboard never writes, so a refresh running meanwhile neither blocks it nor gets blocked
+    store = open_reader()
+    if store is None:
+        return {}, {}, None
+    with closing(store):
+        return ({name: load_article_columns(store, name) for name in subject_names},
+                {name: subject_term_counts(store, name) for name in subject_names},
+                last_refreshed(store))
+
+
+@st.cache_data
+def load_summary(subject_names, updated_at, exclude_cross_listed=False):
+    """
+    Pre-aggregate the scores of the subjects for the comparison page, once per refresh of the store
+    Parameters:
+    - subject_names (tuple): The names of the subjects to compare
+    - updated_at (float): The time of the last refresh, only used as the cache key
+    - exclude_cross_listed (bool): Leave out the articles listed under several subjects
+    Returns:
+    - dict: The means, quantiles, boxplot statistics, histograms and KDE grids of every subject
+    """
+    with closing(open_reader()) as store:
+        scores = load_scores(store, subject_names)
+    if exclude_cross_listed:
+        scores = scores[~scores["cross_listed"]]
+    return summarize_scores(scores)
+
+
+@st.cache_data
+def load_trends(subject_names, period, updated_at):
+    """
+    Read the sentiment rollups maintained by refresh.py, once per refresh of the store
+    Parameters:
+    - subject_names (tuple): The names of the subjects
+    - period (str): "day" or "week"
+    - updated_at (float): The time of the last refresh, only used as the cache key
+    Returns:
+    - pd.DataFrame: One row per subject and time bucket, see load_rollups
+    """
+    with closing(open_reader()) as store:
+        return load_rollups(store, subject_names, period)
+
+
+@st.cache_data
+def load_distinctive_terms(subject_names, updated_at, _term_counts):
+    """
+    Find the distinctive terms of every subject, once per refresh of the store
+    Parameters:
+    - subject_names (tuple): The names of the subjects to compare
+    - updated_at (float): The time of the last refresh, only used as the cache key
+    - _term_counts (dict): The term counts of every subject, left out of the cache key
+    Returns:
+    - dict: The z-scores of the distinctive terms of each subject, see distinctive_terms
+    """
+    return distinctive_terms({name: _term_counts[name] for name in subject_names})
+
+
+@st.cache_data
+def load_latest_run(updated_at):
+    """
+    Read the stage timings and counters of the latest refresh run
+    Parameters:
+    - updated_at (float): The time of the last refresh, only used as the cache key
+    Returns:
+    - dict: The run summary, see latest_run
+    """
+    with closing(open_reader()) as store:
+        return latest_run(store)
+
+
+subjects = load_subjects()
+colors = {subject["name"]: subject["color"] for subject in subjects}
+articles, term_counts, updated_at = load_articles(tuple(colors))
 
 # Streamlit UI
 st.title("Sentiment Analysis Dashboard")
 
-# Sidebar navigation
+if updated_at is None:
+    st.warning("No articles found yet. Run `python refresh.py` to fetch and analyze the latest articles.")
+    st.stop()
+st.caption(f"Last updated {datetime.fromtimestamp(updated_at):%Y-%m-%d %H:%M}")
+
+# Sidebar navigation, one page per subject plus the comparison when there is something to compare
 st.sidebar.title("Select Analysis")
-page = st.sidebar.radio("Go to", ["Trump", "Harris", "Comparison"])
+page = st.sidebar.radio("Go to", list(articles) + (["Comparison"] if len(articles) > 1 else [])
+                        + ["Trends", "Search", "Pipeline health"])
 
 # Page selection
-if page == "Trump":
-    st.write("Analyzing Trump articles...")
-    # Convert the Trump articles data into a DataFrame
-    selected_df = pd.DataFrame(articles_trump)
-
-elif page == "Harris":
-    st.write("Analyzing Harris articles...")
-    # Convert the Harris articles data into a DataFrame
-    selected_df = pd.DataFrame(articles_harris)
+if page in articles:
+    st.write(f"Analyzing {page} articles...")
+    # The columns of the subject are used as loaded, without copying them into a new DataFrame
+    selected_df = articles[page]
 
 elif page == "Comparison":
-    st.write("Comparing Trump and Harris articles...")
+    names = list(articles)
+    st.write(f"Comparing {', '.join(names[:-1])} and {names[-1]} articles...")
 
     # # Call the comparison function
-    display_comparisons(
-        [article["polarity"] for article in articles_trump],
-        [article["polarity"] for article in articles_harris],
-        [article["subjectivity"] for article in articles_trump],
-        [article["subjectivity"] for article in articles_harris],
-        [article["content"] for article in articles_trump],
-        [article["content"] for article in articles_harris]
-    )
+    # The same story is often listed under several subjects, it can be left out of the comparison
+    exclude_cross_listed = st.checkbox("Exclude articles listed under several subjects")
+    display_comparisons(load_summary(tuple(colors), updated_at, exclude_cross_listed), term_counts, colors,
+                        load_distinctive_terms(tuple(colors), updated_at, term_counts))
+
+elif page == "Trends":
+    st.header("Sentiment Over Time")
+    # The rollups are updated as articles are ingested, no article is read here
+    period = st.radio("Group by", ["day", "week"], format_func={"day": "Daily", "week": "Weekly"}.get,
+                      horizontal=True)
+    display_trends(load_trends(tuple(colors), period, updated_at), colors)
+
+elif page == "Search":
+    st.header("Search Articles")
+    # Searches run against the full-text index of the store, never over the loaded articles
+    with closing(open_reader()) as store:
+        display_search(store, list(colors))
+
+elif page == "Pipeline health":
+    st.header("Pipeline Health")
+    display_pipeline_health(load_latest_run(updated_at))
 
 # Call functions from the analysis file
-if page in ["Trump", "Harris"]:
+if page in articles:
     st.header(f"{page} Articles")
     
     st.subheader("Word Cloud")
-    plot_word_cloud(selected_df["content"].apply(preprocess_text).tolist())
+    # Term counts are maintained at ingestion, so no text is tokenized here
+    plot_word_cloud(term_counts[page])
     
     st.subheader("Sentiment Distribution")
     plot_sentiment_histograms(selected_df["polarity"], selected_df["subjectivity"])
@@ -54,4 +162,12 @@ if page in ["Trump", "Harris"]:
         selected_df["polarity_class"],
         selected_df["subjectivity"].round(3),
         selected_df["subjectivity_class"]
-    )
\ No newline at end of file
+    )
+
+    st.subheader("Read an Article")
+    # Texts stay in the store, only the chosen one is read
+    choice = st.selectbox("Article", range(len(selected_df)), index=None, placeholder="Choose an article",
+                          format_func=lambda i: selected_df["title"].iloc[i])
+    if choice is not None:
+        with closing(open_reader()) as store:
+            st.write(load_body(store, selected_df["url"].iloc[choice]) or "This article is no longer stored.")
@@ -0,0 +1,185 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from pipeline.guardian import GUARDIAN_API_URL, PARAGRAPH_FIELDS, SHOW_FIELDS, iter_results
+from pipeline.ingest import ingest_results
+from pipeline.metrics import count
+from pipeline.store import high_water_mark, save_subject
+
+# Largest page the Guardian API serves, a backfill walks every page of its windows
+BACKFILL_PAGE_SIZE = 200
+
+
+def date_windows(start, end, days=7):
+    """
+    Split a date range into consecutive windows, newest first
+    Parameters:
+    - start (str): The first day of the range (YYYY-MM-DD)
+    - end (str): The last day of the range (YYYY-MM-DD), included
+    - days (int): The number of days per window, the oldest window may be shorter
+    Returns:
+    - list: The (from_date, to_date) pairs of the windows, both days included
+    """
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    if days < 1 or last < first:
+        raise ValueError(f"Error: cannot split {start} to {end} into windows of {days} days.")
+    windows = []
+    while last >= first:
+        window_start = max(first, last - timedelta(days=days - 1))
+        windows.append((window_start.isoformat(), last.isoformat()))
+        last = window_start - timedelta(days=1)
+    return windows
+
+
+class Checkpoint:
+    """
+    Append-only JSON lines log of a backfill: the finished windows, the stored URLs and the failures.
+    Reading it back lets an interrupted backfill resume where it stopped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.windows = set()
+        self.urls = set()
+        self.failures = {}
+        if os.path.exists(path):
+            self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, "rb+") as file:
+            data = file.read()
+            # A crash can leave half a line at the end, it is dropped so new lines start clean
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                file.truncate(end)
+        for line in data[:end].decode("utf-8").splitlines():
+            entry = json.loads(line)
+            subject = entry["subject"]
+            if entry["kind"] == "window":
+                window = tuple(entry["window"])
+                self.windows.add((subject, window))
+                self.failures.pop((subject, window), None)
+            elif entry["kind"] == "url":
+                self.urls.add((subject, entry["url"]))
+                self.failures.pop((subject, entry["url"]), None)
+            else:
+                self.failures[(subject, entry["url"] or tuple(entry["window"]))] = entry
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+
+    def window_done(self, subject, window, urls):
+        """Record the stored URLs of a window, and the window itself when none of its articles failed"""
+        self.failures.pop((subject, window), None)
+        for url in urls:
+            self.urls.add((subject, url))
+            self.failures.pop((subject, url), None)
+            self._write({"kind": "url", "subject": subject, "url": url})
+        if not any(entry["subject"] == subject and tuple(entry["window"]) == window
+                   for entry in self.failures.values()):
+            self.windows.add((subject, window))
+            self._write({"kind": "window", "subject": subject, "window": window})
+        # Flushed to disk before the next window, so a crash loses at most the window in progress
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def failure(self, subject, window, error, url=None):
+        """Record an article, or a whole window when url is None, that could not be ingested"""
+        entry = {"kind": "failure", "subject": subject, "window": window, "url": url,
+                 "error": f"{type(error).__name__}: {error}"}
+        self.failures[(subject, url or tuple(window))] = entry
+        self._write(entry)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _prefetch(func, items, workers):
+    # Like executor.map, in order, but with at most two items per worker in flight so a long backfill
+    # does not hold every window in memory
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+def backfill(store, subjects, windows, api_key, article, score_batch, preprocess_batch, checkpoint, workers=4,
+             mode="api", session=None, base_url=GUARDIAN_API_URL, paragraphs=False):
+    """
+    Fetch, score and store every article of the subjects published in a range of date windows
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subjects (list): The subject configs to backfill
+    - windows (list): The (from_date, to_date) windows to fetch, newest first, see date_windows
+    - api_key (str): The API key for the Guardian API
+    - article (callable): Parses a downloaded page, called as article(url, html)
+    - score_batch (callable): Scores the texts of many articles at once, see analyze_records
+    - preprocess_batch (callable): Preprocesses the texts of many articles at once, see analyze_records
+    - checkpoint (Checkpoint): The log of the backfill, its finished windows and stored URLs are skipped
+    - workers (int): The number of windows whose API pages are fetched at the same time
+    - mode (str): "api" or "html", see ingest_results
+    - session (requests.Session): Optional session reused for every request
+    - base_url (str): The root of the Guardian API, overridden in tests
+    - paragraphs (bool): Keep the paragraph breaks of the article texts, see ingest_subject
+    Returns:
+    - dict: The number of windows processed and skipped, of articles stored and of failures recorded
+    """
+    todo = [(subject, window) for subject in subjects for window in windows
+            if (subject["name"], window) not in checkpoint.windows]
+    summary = {"windows": 0, "skipped": len(subjects) * len(windows) - len(todo), "articles": 0, "failures": 0}
+
+    def fetch_window(task):
+        subject, (from_date, to_date) = task
+        return list(iter_results(api_key, subject["section"], session=session, page_size=BACKFILL_PAGE_SIZE,
+                                 from_date=from_date, to_date=to_date, order_by="newest",
+                                 query=subject.get("query"), base_url=base_url,
+                                 show_fields=PARAGRAPH_FIELDS if paragraphs else SHOW_FIELDS))
+
+    # The API pages of the next windows are fetched by the workers while the current one is scored and saved
+    # here, so the store is only ever written from this thread
+    for (subject, window), future in _prefetch(fetch_window, todo, workers):
+        name = subject["name"]
+        failed = []
+        try:
+            results = [result for result in future.result() if (name, result["webUrl"]) not in checkpoint.urls]
+            records = ingest_results(results, article, score_batch, preprocess_batch, mode=mode, session=session,
+                                     store=store, on_error=lambda url, error: failed.append((url, error)))
+            # Windows run newest first, so only the first one of a new subject sets its high-water mark
+            newest = results[0] if results and high_water_mark(store, name) is None else None
+            save_subject(store, name, records, newest=newest, older=True)
+        except Exception as error:
+            # Only the subject links of the window are rolled back, ingest_results commits as it goes: the LSH
+            # entries before scoring, then the cached scores and the articles. On resume the retried window finds
+            # the saved articles by URL and body hash instead of scoring them again, and a duplicate of an entry
+            # indexed without its article is scored itself (see the orphans in ingest_results). A window that is
+            # never retried leaves unlisted articles, which age out with evict
+            store.rollback()
+            checkpoint.failure(name, window, error)
+            summary["failures"] += 1
+            print(f"{name} {window[0]} to {window[1]}: failed, {error}")
+            continue
+
+        for url, error in failed:
+            checkpoint.failure(name, window, error, url=url)
+        checkpoint.window_done(name, window, [record["url"] for record in records])
+        summary["windows"] += 1
+        summary["articles"] += len(records)
+        summary["failures"] += len(failed)
+        count("articles", len(records), subject=name)
+        print(f"{name} {window[0]} to {window[1]}: stored {len(records)} articles"
+              + (f", {len(failed)} failed" if failed else ""))
+    return summary
@@ -0,0 +1,115 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+# MinHash signature length, split into LSH bands of NUM_PERM // LSH_BANDS rows. Two articles become candidates
+# when all the rows of one band match, likely above a Jaccard similarity of about (1 / LSH_BANDS) ** (1 / rows)
+NUM_PERM = 128
+LSH_BANDS = 16
+# Candidates at least this similar (estimated Jaccard similarity of their shingles) are duplicates
+DUPLICATE_THRESHOLD = 0.8
+# Words per shingle
+SHINGLE_SIZE = 5
+# Shingles hashed against all the permutations at a time, bounding the memory used on long live blogs
+SHINGLE_BLOCK = 4096
+
+WORD_PATTERN = re.compile(r"\w+")
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20241105)
+_A = _rng.randint(1, _PRIME, NUM_PERM).astype(np.uint64)[:, None]
+_B = _rng.randint(0, _PRIME, NUM_PERM).astype(np.uint64)[:, None]
+
+
+def shingle_hashes(text):
+    """
+    Hash the overlapping word shingles of a text
+    Parameters:
+    - text (str): The body of an article
+    Returns:
+    - np.ndarray: The distinct 32-bit hashes of its shingles of SHINGLE_SIZE words, empty for texts shorter than
+      one shingle
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64)
+
+
+def minhash(text):
+    """
+    Compute the MinHash signature of a text
+    Parameters:
+    - text (str): The body of an article
+    Returns:
+    - np.ndarray: NUM_PERM minimum hashes, the share of equal positions between two signatures estimates
+      the Jaccard similarity of the two texts, None for texts shorter than one shingle
+    """
+    hashes = shingle_hashes(text) % _PRIME
+    # Empty or stub bodies (e.g. failed parses) would all share one signature and pass for duplicates
+    if not len(hashes):
+        return None
+    signature = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), SHINGLE_BLOCK):
+        block = hashes[start:start + SHINGLE_BLOCK]
+        signature = np.minimum(signature, ((_A * block + _B) % _PRIME).min(axis=1))
+    return signature.astype(np.uint32)
+
+
+def similarity(signature, other):
+    """Estimate the Jaccard similarity of two texts from their MinHash signatures"""
+    return float(np.mean(signature == other))
+
+
+def band_keys(signature):
+    """
+    Hash every LSH band of a signature
+    Parameters:
+    - signature (np.ndarray): A MinHash signature
+    Returns:
+    - list: One signed 64-bit key per band, as stored by SQLite
+    """
+    return [int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "big", signed=True)
+            for band in np.split(signature, LSH_BANDS)]
+
+
+def find_duplicate(store, url, signature, threshold=DUPLICATE_THRESHOLD):
+    """
+    Look up the stored article most similar to a body
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - url (str): The URL of the article, its own earlier version is not a duplicate
+    - signature (np.ndarray): The MinHash signature of the body
+    - threshold (float): The minimum estimated similarity of a duplicate
+    Returns:
+    - str: The URL of the canonical article the body duplicates, or None for a new body
+    """
+    keys = band_keys(signature)
+    rows = store.execute(f"""
+        SELECT url, signature FROM article_signatures WHERE url != ? AND url IN (
+            SELECT url FROM lsh_bands WHERE (band, key) IN (VALUES {", ".join(["(?, ?)"] * len(keys))})
+        )
+    """, [url, *(value for band, key in enumerate(keys) for value in (band, key))]).fetchall()
+
+    best, best_similarity = None, threshold
+    for row in rows:
+        candidate_similarity = similarity(signature, np.frombuffer(row["signature"], dtype=np.uint32))
+        if candidate_similarity >= best_similarity:
+            best, best_similarity = row["url"], candidate_similarity
+    return best
+
+
+def index_article(store, url, signature):
+    """
+    Add the signature of a newly scored article to the LSH index
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - url (str): The URL of the article
+    - signature (np.ndarray): The MinHash signature of its body
+    Returns:
+    - None
+    """
+    store.execute("DELETE FROM lsh_bands WHERE url = ?", (url,))
+    store.execute("INSERT OR REPLACE INTO article_signatures VALUES (?, ?)", (url, signature.tobytes()))
+    store.executemany("INSERT INTO lsh_bands VALUES (?, ?, ?)",
+                      [(band, key, url) for band, key in enumerate(band_keys(signature))])
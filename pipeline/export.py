@@ -0,0 +1,190 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pipeline.store import STORE_PATH, iter_subject, open_store
+from pipeline.subjects import SUBJECTS_FILE, load_subjects
+
+EXPORT_SCHEMA = pa.schema([
+    ("subject", pa.string()),
+    ("title", pa.string()),
+    ("url", pa.string()),
+    ("published", pa.string()),
+    ("polarity", pa.float64()),
+    ("subjectivity", pa.float64()),
+    ("polarity_class", pa.string()),
+    ("subjectivity_class", pa.string()),
+    ("term_counts", pa.map_(pa.string(), pa.int32())),
+])
+EXPORT_FIELDS = EXPORT_SCHEMA.names
+
+
+class JsonlWriter:
+    """Append scored article records to a JSON lines file, one line per article"""
+
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, subject, record):
+        row = {"subject": subject, **{field: record[field] for field in EXPORT_FIELDS[1:]}}
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetWriter:
+    """
+    Append scored article records to a Parquet dataset directory, writing a new part file every row_group_size
+    records and on every flush, so earlier runs are kept and every written part is readable right away
+    """
+
+    def __init__(self, path, row_group_size=1000):
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._row_group_size = row_group_size
+        self._rows = []
+
+    def write(self, subject, record):
+        self._rows.append({"subject": subject, **{field: record[field] for field in EXPORT_FIELDS[1:]}})
+        if len(self._rows) >= self._row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            # Parts are named by time so they replay in order, and renamed into place once complete so a
+            # killed process never leaves a truncated part behind
+            name = f"part-{time.time_ns():020d}-{os.getpid()}.parquet"
+            temporary = os.path.join(self._path, f".{name}.tmp")
+            pq.write_table(pa.Table.from_pylist(self._rows, schema=EXPORT_SCHEMA), temporary)
+            os.replace(temporary, os.path.join(self._path, name))
+            self._rows = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _parts(path):
+    # The complete part files of a Parquet dataset directory, oldest first
+    return sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+
+
+def open_writer(path, row_group_size=1000):
+    """
+    Open a streaming writer for scored article records
+    Parameters:
+    - path (str): A .parquet dataset directory, or any other file, appended to as JSON lines
+    - row_group_size (int): The maximum number of records per Parquet part file
+    Returns:
+    - JsonlWriter or ParquetWriter: A writer with write(subject, record), flush() and close() methods
+    """
+    if path.endswith(".parquet"):
+        return ParquetWriter(path, row_group_size)
+    return JsonlWriter(path)
+
+
+def iter_records(path, batch_size=1000):
+    """
+    Replay an export lazily, one article record at a time
+    Parameters:
+    - path (str): An export written by open_writer
+    - batch_size (int): The number of Parquet rows decoded at a time
+    Returns:
+    - generator: The article records as dicts
+    """
+    if path.endswith(".parquet"):
+        for part in _parts(path):
+            for batch in pq.ParquetFile(part).iter_batches(batch_size=batch_size):
+                for row in batch.to_pylist():
+                    row["term_counts"] = dict(row["term_counts"])
+                    yield row
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def iter_dataframes(path, batch_size=10000, columns=None):
+    """
+    Replay an export lazily as DataFrames of at most batch_size articles
+    Parameters:
+    - path (str): An export written by open_writer
+    - batch_size (int): The number of articles per DataFrame
+    - columns (list): Only read these columns (Parquet only reads them from disk)
+    Returns:
+    - generator: The DataFrames
+    """
+    if path.endswith(".parquet"):
+        for part in _parts(path):
+            for batch in pq.ParquetFile(part).iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas(maps_as_pydicts="strict")
+    else:
+        for df in pd.read_json(path, lines=True, chunksize=batch_size):
+            yield df[columns] if columns else df
+
+
+def read_dataframe(path, columns=None):
+    """
+    Load an export into a single DataFrame, memory-mapping Parquet files
+    Parameters:
+    - path (str): An export written by open_writer
+    - columns (list): Only load these columns, e.g. the scores without the term counts
+    Returns:
+    - pd.DataFrame: One row per article
+    """
+    if path.endswith(".parquet"):
+        dataset = pq.ParquetDataset(_parts(path), schema=EXPORT_SCHEMA, memory_map=True)
+        return dataset.read(columns=columns).to_pandas(maps_as_pydicts="strict")
+    return pd.concat(iter_dataframes(path, columns=columns), ignore_index=True)
+
+
+def export_store(store, path, subject_names):
+    """
+    Stream every stored article of the given subjects to an export file
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - path (str): The export, see open_writer
+    - subject_names (list): The subjects to export
+    Returns:
+    - int: The number of exported articles
+    """
+    count = 0
+    with open_writer(path) as writer:
+        for subject in subject_names:
+            for record in iter_subject(store, subject):
+                writer.write(subject, record)
+                count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the scored articles of the store to JSONL or Parquet")
+    parser.add_argument("path", help="output, a .parquet dataset directory or a JSON lines file otherwise")
+    parser.add_argument("--store", default=STORE_PATH, help="path of the article store")
+    parser.add_argument("--subjects", default=SUBJECTS_FILE, help="JSON file listing the subjects to export")
+    args = parser.parse_args()
+
+    subject_names = [subject["name"] for subject in load_subjects(args.subjects)]
+    count = export_store(open_store(args.store), args.path, subject_names)
+    print(f"Exported {count} articles to {args.path}")
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.http import HostRateLimiter, get_with_retries, make_session
+from pipeline.metrics import timed
+
+
+def fetch_all(urls, handle, max_workers=8, min_interval=0.1, timeout=10, retries=3, backoff=0.5, session=None,
+              on_error=None):
+    """
+    Download article pages concurrently and pass each page to a handler
+    Parameters:
+    - urls (iterable): The article URLs to download, consumed lazily so downloads start
+      while a generator is still producing URLs
+    - handle (callable): Called as handle(url, html) for every downloaded page
+    - max_workers (int): The maximum number of pages downloaded at the same time
+    - min_interval (float): Minimum delay in seconds between two requests to the same host
+    - timeout (float): Seconds to wait for each URL before retrying it
+    - retries (int): How many times a failing URL is retried
+    - backoff (float): Delay before the first retry, doubled on every further retry
+    - session (requests.Session): Optional session to reuse, a pooled one is created otherwise
+    - on_error (callable): Called as on_error(url, error) when a page cannot be downloaded or handled, which
+      then yields None instead of aborting every download, errors are raised when not given
+    Returns:
+    - list: The values returned by handle, in the same order as urls
+    """
+    if session is None:
+        session = make_session(max_workers)
+    rate_limiter = HostRateLimiter(min_interval)
+
+    def work(url):
+        try:
+            with timed("download", url=url):
+                response = get_with_retries(session, url, timeout=timeout, retries=retries, backoff=backoff,
+                                            rate_limiter=rate_limiter, stage="download")
+            return handle(url, response.text)
+        except Exception as error:
+            if on_error is None:
+                raise
+            on_error(url, error)
+            return None
+
+    # executor.map keeps the input order, so results line up with urls
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(work, urls))
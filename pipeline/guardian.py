@@ -0,0 +1,83 @@
+from itertools import islice
+
+from pipeline.http import get_with_retries, make_session
+from pipeline.metrics import timed
+
+GUARDIAN_API_URL = "https://content.guardianapis.com"
+SHOW_FIELDS = "headline,bodyText,wordcount"
+# bodyText runs the paragraphs together, the body HTML is also requested when articles are scored by paragraph
+# or sentence
+PARAGRAPH_FIELDS = SHOW_FIELDS + ",body"
+
+
+def iter_results(api_key, section, session=None, page_size=50, limit=None, from_date=None, to_date=None,
+                 order_by=None, query=None, base_url=GUARDIAN_API_URL, show_fields=SHOW_FIELDS):
+    """
+    Walk the Guardian API pages of a section and yield its articles as each page arrives
+    Parameters:
+    - api_key (str): The API key for the Guardian API
+    - section (str): The section (or tag path) to fetch articles from
+    - session (requests.Session): Optional session to reuse across calls
+    - page_size (int): The number of articles requested per page
+    - limit (int): Stop after this many articles, None walks every page
+    - from_date (str): Only articles published on or after this date (YYYY-MM-DD)
+    - to_date (str): Only articles published on or before this date (YYYY-MM-DD)
+    - order_by (str): "newest", "oldest" or "relevance"
+    - query (str): Optional search terms, e.g. with section="search" to search the whole site
+    - base_url (str): The root of the API, overridden in tests
+    - show_fields (str): The fields returned with every article, SHOW_FIELDS or PARAGRAPH_FIELDS
+    Returns:
+    - generator: The article results as returned by the API
+    """
+    if session is None:
+        session = make_session()
+
+    # Only ask for the fields the pipeline reads, "all" would also ship the full body HTML
+    params = {"api-key": api_key, "show-fields": show_fields, "page-size": page_size}
+    if from_date:
+        params["from-date"] = from_date
+    if to_date:
+        params["to-date"] = to_date
+    if order_by:
+        params["order-by"] = order_by
+    if query:
+        params["q"] = query
+
+    results = _iter_pages(session, f"{base_url}/{section}", params)
+    return islice(results, limit) if limit is not None else results
+
+
+def _iter_pages(session, url, params):
+    page = 1
+    while True:
+        with timed("api", url=url, page=page):
+            response = get_with_retries(session, url, params={**params, "page": page}, stage="api")
+            data = response.json().get("response", {})
+        yield from data.get("results", [])
+
+        # Follow the currentPage/pages cursor until the last page
+        current_page = data.get("currentPage", page)
+        if current_page >= data.get("pages", 0):
+            return
+        page = current_page + 1
+
+
+def fetch_articles(api_key, section, page_size=50, limit=20, **kwargs):
+    """
+    Fetch article URLs from the Guardian API for a specific section
+    Parameters:
+    - api_key (str): The API key for the Guardian API
+    - section (str): The section to fetch articles from
+    - page_size (int): The number of articles requested per page
+    - limit (int): The maximum number of articles to return
+    - kwargs: Extra options passed to iter_results (session, dates, order_by)
+    Returns:
+    - list: A list of article URLs
+    """
+    article_urls = [result["webUrl"] for result in iter_results(api_key, section, page_size=page_size,
+                                                                 limit=limit, **kwargs)]
+    if article_urls:
+        print(f"Retrieved {len(article_urls)} articles")
+    else:
+        print("No articles found.")
+    return article_urls
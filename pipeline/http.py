@@ -0,0 +1,82 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pipeline.metrics import count
+
+USER_AGENT = "WebScrapingNews-TrumpHarris/1.0"
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def make_session(pool_size=10):
+    """
+    Create a requests session with pooled keep-alive connections
+    Parameters:
+    - pool_size (int): The number of connections to keep open per host
+    Returns:
+    - requests.Session: The configured session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class HostRateLimiter:
+    """Space out requests to the same host by at least min_interval seconds"""
+
+    def __init__(self, min_interval=0.1):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until the host of url may be contacted again"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def get_with_retries(session, url, params=None, timeout=10, retries=3, backoff=0.5, rate_limiter=None, stage="http"):
+    """
+    GET a URL, retrying connection errors and transient HTTP errors with exponential backoff
+    Parameters:
+    - session (requests.Session): The session used to make the request
+    - url (str): The URL to fetch
+    - params (dict): Optional query string parameters
+    - timeout (float): Seconds to wait for the server on each attempt
+    - retries (int): How many times to retry after the first attempt
+    - backoff (float): Delay before the first retry, doubled on every further retry
+    - rate_limiter (HostRateLimiter): Optional limiter consulted before every attempt
+    - stage (str): The pipeline stage the request belongs to, labels its metrics
+    Returns:
+    - requests.Response: The successful response
+    """
+    for attempt in range(retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.wait(url)
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            count("http_errors", stage=stage, error=type(error).__name__)
+            if attempt == retries:
+                raise
+        else:
+            count("http_responses", stage=stage, status=response.status_code)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                count("bytes_fetched", len(response.content), stage=stage)
+                return response
+        count("http_retries", stage=stage)
+        time.sleep(backoff * 2 ** attempt)
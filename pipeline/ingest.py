@@ -0,0 +1,257 @@
+import html
+import re
+from collections import Counter
+from itertools import takewhile
+
+from pipeline.dedup import find_duplicate, index_article, minhash
+from pipeline.fetch import fetch_all
+from pipeline.guardian import GUARDIAN_API_URL, PARAGRAPH_FIELDS, SHOW_FIELDS, iter_results
+from pipeline.metrics import count, timed
+from pipeline.store import GRANULAR_COLUMNS, cached_record, high_water_mark, save_records, save_subject
+
+
+# Paragraphs of the body HTML field of the Guardian API, and the inline tags within them
+BODY_PARAGRAPH_PATTERN = re.compile(r"<p(?:\s[^>]*)?>(.*?)</p>", re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def paragraph_text(body_html):
+    """
+    Extract the text of an article from its body HTML, keeping the paragraph breaks bodyText drops
+    Parameters:
+    - body_html (str): The body field of a Guardian API result
+    Returns:
+    - str: The text of the paragraphs, separated by blank lines
+    """
+    paragraphs = (html.unescape(TAG_PATTERN.sub("", match.group(1))).strip()
+                  for match in BODY_PARAGRAPH_PATTERN.finditer(body_html))
+    return "\n\n".join(paragraph for paragraph in paragraphs if paragraph)
+
+
+def build_record(url, title, text, published=None):
+    """
+    Collect the details of an article, before its sentiment is scored
+    Parameters:
+    - url (str): The URL of the article
+    - title (str): The title of the article
+    - text (str): The text of the article
+    - published (str): The webPublicationDate of the article, when known
+    Returns:
+    - dict: The article details
+    """
+    return {
+        "title": title,
+        "content": text,
+        "url": url,
+        "published": published
+    }
+
+
+# Everything a duplicate article takes over from the canonical copy it duplicates
+SHARED_COLUMNS = ["polarity", "subjectivity", "polarity_class", "subjectivity_class", *GRANULAR_COLUMNS, "tokens",
+                  "term_counts"]
+
+
+def _plain(value):
+    # sqlite3 cannot bind NumPy scalars
+    return value.item() if hasattr(value, "item") else value
+
+
+def analyze_records(records, score_batch, preprocess_batch):
+    """
+    Score the sentiment of article records and preprocess their text in one batch, adding the results to them
+    Parameters:
+    - records (list): The article records to analyze
+    - score_batch (callable): Scores a list of texts, returning a DataFrame with polarity, subjectivity,
+      polarity_class and subjectivity_class columns, plus the GRANULAR_COLUMNS when chunks are scored
+    - preprocess_batch (callable): Preprocesses a list of texts into space separated tokens (or None)
+    Returns:
+    - None
+    """
+    texts = [record["content"] for record in records]
+    with timed("score", items=len(texts)):
+        scores = score_batch(texts)
+    with timed("preprocess", items=len(texts)):
+        tokens = preprocess_batch(texts)
+    for record, row, article_tokens in zip(records, scores.itertuples(index=False), tokens):
+        record.update({
+            "polarity": float(row.polarity),
+            "subjectivity": float(row.subjectivity),
+            "polarity_class": row.polarity_class,
+            "subjectivity_class": row.subjectivity_class,
+            # Distribution of the chunk scores, None when articles are scored as a whole
+            **{column: _plain(getattr(row, column, None)) for column in GRANULAR_COLUMNS},
+            # Tokens and their counts are computed once here, so the dashboard never preprocesses text
+            "tokens": article_tokens,
+            "term_counts": dict(Counter(article_tokens.split())) if article_tokens else {}
+        })
+
+
+def split_duplicates(store, records):
+    """
+    Separate the new article bodies from the near-duplicates of already indexed ones, indexing the new ones
+    Parameters:
+    - store (sqlite3.Connection): The article store, holding the LSH index of the article bodies
+    - records (list): The article records to score
+    Returns:
+    - tuple: The records to score and the duplicate records, every record gets the canonical_url it shares
+      its scores with, its own URL for new bodies
+    """
+    unique = []
+    duplicates = []
+    with timed("dedup", items=len(records)):
+        for record in records:
+            signature = minhash(record["content"])
+            # Bodies too short to compare are never duplicates, nor indexed
+            canonical = find_duplicate(store, record["url"], signature) if signature is not None else None
+            if canonical is None:
+                # Indexed right away, so later copies in the same batch are caught too
+                if signature is not None:
+                    index_article(store, record["url"], signature)
+                record["canonical_url"] = record["url"]
+                unique.append(record)
+            else:
+                record["canonical_url"] = canonical
+                duplicates.append(record)
+    count("duplicates", len(duplicates))
+    return unique, duplicates
+
+
+def ingest_results(results, article, score_batch, preprocess_batch, mode="api", session=None, store=None,
+                   on_error=None):
+    """
+    Turn Guardian API results into scored article records
+    Parameters:
+    - results (iterable): Article results from the Guardian API
+    - article (callable): Parses a downloaded page, called as article(url, html)
+    - score_batch (callable): Scores the texts of many articles at once, see analyze_records
+    - preprocess_batch (callable): Preprocesses the texts of many articles at once, see analyze_records
+    - mode (str): "api" builds the records from the bodyText (or body, when requested) and headline fields of
+      the payload and only downloads the pages that come without a body, "html" downloads and parses every page
+    - session (requests.Session): Optional session reused for the page downloads
+    - store (sqlite3.Connection): Optional article store, articles already in it are neither downloaded
+      nor scored again, and newly scored ones are saved to it
+    - on_error (callable): Called as on_error(url, error) for every page that cannot be downloaded or parsed,
+      the article is then left out instead of failing the whole batch, errors are raised when not given
+    Returns:
+    - list: The scored article records, in the order of the results
+    """
+    def parse(url, html):
+        text, title = article(url, html)
+        return build_record(url, title, text)
+
+    records = []
+    missing = []
+    for result in results:
+        url = result["webUrl"]
+        fields = result.get("fields", {})
+        body = fields.get("bodyText") if mode == "api" else None
+        if mode == "api" and fields.get("body"):
+            # Requested for granular scoring, see PARAGRAPH_FIELDS
+            body = paragraph_text(fields["body"]) or body
+
+        # An article whose body did not change keeps its stored sentiment scores
+        cached = cached_record(store, url, body) if store is not None else None
+        if cached is not None:
+            count("cache_hits")
+            records.append(cached)
+        elif body:
+            title = fields.get("headline") or result.get("webTitle", "")
+            records.append(build_record(url, title, body, result.get("webPublicationDate")))
+        else:
+            # Keep the slot so the downloaded article lands in its original position
+            missing.append(len(records))
+            records.append(result)
+
+    # Download and parse the articles the API did not return a usable body for
+    if missing:
+        fetched = fetch_all([records[i]["webUrl"] for i in missing], parse, session=session, on_error=on_error)
+        for i, record in zip(missing, fetched):
+            if record is not None:
+                record["published"] = records[i].get("webPublicationDate")
+            records[i] = record
+        records = [record for record in records if record is not None]
+
+    # Near-duplicates of stored or earlier articles, e.g. a story listed in two sections or a live blog
+    # republished under a new URL, share the scores of the first copy instead of being scored again
+    unscored = [record for record in records if "polarity" not in record]
+    duplicates = []
+    if store is not None:
+        unscored, duplicates = split_duplicates(store, unscored)
+
+    # The index entries are committed before the CPU-bound scoring, so no write lock is held meanwhile
+    if store is not None:
+        store.commit()
+
+    # Score and preprocess all the new articles in one batch
+    if unscored:
+        analyze_records(unscored, score_batch, preprocess_batch)
+
+    scored = {record["url"]: record for record in unscored}
+    orphans = []
+    for record in duplicates:
+        canonical = scored.get(record["canonical_url"]) or cached_record(store, record["canonical_url"])
+        if canonical is None:
+            # The canonical copy was indexed by a run that failed before saving it
+            record["canonical_url"] = record["url"]
+            orphans.append(record)
+        else:
+            record.update({column: canonical[column] for column in SHARED_COLUMNS})
+    if orphans:
+        analyze_records(orphans, score_batch, preprocess_batch)
+
+    if store is not None:
+        with timed("save", items=len(records)):
+            save_records(store, records)
+
+    return records
+
+
+def ingest_subject(store, subject, api_key, article, score_batch, preprocess_batch, limit=20, mode="api",
+                   incremental=True, session=None, base_url=GUARDIAN_API_URL, paragraphs=False):
+    """
+    Fetch, score and store the articles of a subject published since its last run
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject (dict): The subject config, with the name and the Guardian section or query to fetch
+    - api_key (str): The API key for the Guardian API
+    - article (callable): Parses a downloaded page, called as article(url, html)
+    - score_batch (callable): Scores the texts of many articles at once, see analyze_records
+    - preprocess_batch (callable): Preprocesses the texts of many articles at once, see analyze_records
+    - limit (int): The number of articles fetched on the first run, later runs fetch everything new
+    - mode (str): "api" or "html", see ingest_results
+    - incremental (bool): Only fetch articles newer than the high-water mark of the subject, False
+      fetches the latest limit articles again and replaces the stored list
+    - session (requests.Session): Optional session reused for every request
+    - base_url (str): The root of the Guardian API, overridden in tests
+    - paragraphs (bool): Keep the paragraph breaks of the article texts, for scoring by paragraph or sentence
+    Returns:
+    - list: The newly ingested article records, newest first
+    """
+    mark = high_water_mark(store, subject["name"]) if incremental else None
+    show_fields = PARAGRAPH_FIELDS if paragraphs else SHOW_FIELDS
+    if mark is None:
+        results = iter_results(api_key, subject["section"], session=session, limit=limit, order_by="newest",
+                               query=subject.get("query"), base_url=base_url, show_fields=show_fields)
+    else:
+        # Page newest first from the day of the last known article and stop at the first known one
+        newest_published, newest_url = mark
+        results = iter_results(api_key, subject["section"], session=session, order_by="newest",
+                               from_date=newest_published[:10], query=subject.get("query"), base_url=base_url,
+                               show_fields=show_fields)
+        results = takewhile(lambda result: result["webUrl"] != newest_url
+                            and result["webPublicationDate"] >= newest_published, results)
+
+    newest = []
+
+    def remember_newest(results):
+        for result in results:
+            if not newest:
+                newest.append(result)
+            yield result
+
+    records = ingest_results(remember_newest(results), article, score_batch, preprocess_batch, mode=mode,
+                             session=session, store=store)
+    save_subject(store, subject["name"], records, newest=newest[0] if newest else None, append=mark is not None)
+    count("articles", len(records), subject=subject["name"])
+    return records
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Callables receiving every event, see add_hook. Nothing is measured while the list is empty
+_hooks = []
+
+
+def add_hook(hook):
+    """
+    Register a callable receiving the timing and counter events of the pipeline
+    Parameters:
+    - hook (callable): Called as hook(event) with a dict holding the kind ("stage" or "counter") of the event,
+      the name of the stage or counter, its value (seconds or increment) and its labels (e.g. url, status)
+    Returns:
+    - callable: The hook, so it can be removed with remove_hook
+    """
+    _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    """Stop sending events to a hook registered with add_hook"""
+    _hooks.remove(hook)
+
+
+def emit(kind, name, value, **labels):
+    """Send an event to every registered hook"""
+    if not _hooks:
+        return
+    event = {"kind": kind, "name": name, "value": value, **labels}
+    for hook in list(_hooks):
+        hook(event)
+
+
+def count(name, value=1, **labels):
+    """Add value to a counter, e.g. count("bytes_fetched", len(body), stage="download")"""
+    emit("counter", name, value, **labels)
+
+
+@contextmanager
+def timed(stage, **labels):
+    """
+    Time the block as one call of a pipeline stage
+    Parameters:
+    - stage (str): The name of the stage, e.g. "download" or "score"
+    - labels: Details of the call, an url makes it a per-article event and items counts the articles
+      a batch stage processed
+    Returns:
+    - contextmanager: Emits a "stage" event with the elapsed seconds when the block exits
+    """
+    if not _hooks:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit("stage", stage, time.perf_counter() - start, **labels)
+
+
+def counter_key(name, labels):
+    """Name a counter and its labels the way Prometheus does, e.g. http_responses{stage="api",status="200"}"""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+class RunMetrics:
+    """Collect the events of one pipeline run, registered as a hook while used as a context manager"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at = None
+        self.stages = {}
+        self.counters = Counter()
+        # Per-article events, the ones labelled with an url
+        self.events = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        # Downloads report from a thread pool
+        with self._lock:
+            if event["kind"] == "counter":
+                labels = {key: value for key, value in event.items() if key not in ("kind", "name", "value")}
+                self.counters[counter_key(event["name"], labels)] += event["value"]
+                return
+
+            stage = self.stages.setdefault(event["name"], {"seconds": 0.0, "calls": 0, "items": 0})
+            stage["seconds"] += event["value"]
+            stage["calls"] += 1
+            stage["items"] += event.get("items", 1)
+            if "url" in event:
+                self.events.append(event)
+
+    def __enter__(self):
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_hook(self)
+        self.finished_at = time.time()
+
+    def summary(self):
+        """
+        Summarize the run
+        Returns:
+        - dict: The start and end times of the run, the total seconds, calls and items of every stage and
+          the counters, without the per-article events
+        """
+        return {
+            "started_at": self.started_at,
+            "finished_at": self.finished_at or time.time(),
+            "stages": self.stages,
+            "counters": dict(self.counters),
+        }
+
+
+def write_jsonl(run, path):
+    """
+    Append the per-article events of a run to a JSON lines file, followed by a line summarizing the run
+    Parameters:
+    - run (RunMetrics): The finished run
+    - path (str): The JSON lines file
+    Returns:
+    - None
+    """
+    summary = run.summary()
+    with open(path, "a", encoding="utf-8") as f:
+        for event in run.events:
+            f.write(json.dumps({"run": summary["started_at"], **event}) + "\n")
+        f.write(json.dumps({"kind": "run", "run": summary["started_at"], **summary}) + "\n")
+
+
+def to_prometheus(summary):
+    """
+    Format a run summary in the Prometheus text exposition format
+    Parameters:
+    - summary (dict): The summary returned by RunMetrics.summary
+    Returns:
+    - str: The metrics, with stage totals labelled by stage and every counter prefixed with pipeline_
+    """
+    lines = [
+        "# TYPE pipeline_run_started_timestamp_seconds gauge",
+        f"pipeline_run_started_timestamp_seconds {summary['started_at']}",
+        "# TYPE pipeline_run_duration_seconds gauge",
+        f"pipeline_run_duration_seconds {summary['finished_at'] - summary['started_at']}",
+    ]
+    for field in ("seconds", "calls", "items"):
+        lines.append(f"# TYPE pipeline_stage_{field}_total counter")
+        lines.extend(f'pipeline_stage_{field}_total{{stage="{name}"}} {stage[field]}'
+                     for name, stage in summary["stages"].items())
+    typed = set()
+    for key, value in sorted(summary["counters"].items()):
+        name = key.split("{")[0]
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE pipeline_{name}_total counter")
+        lines.append(f"pipeline_{name}_total{key[len(name):]} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(run, path):
+    """
+    Write the summary of a run as a Prometheus text file, e.g. for the node exporter textfile collector
+    Parameters:
+    - run (RunMetrics): The finished run
+    - path (str): The .prom file, replaced atomically
+    Returns:
+    - None
+    """
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(to_prometheus(run.summary()))
+    # The collector never reads a half-written file
+    os.replace(path + ".tmp", path)
@@ -0,0 +1,354 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+import numpy as np
+import pandas as pd
+import os
+import re
+import time
+
+from pipeline.metrics import count, timed
+from pipeline.resources import require, use_local_data
+from pipeline.store import GRANULAR_COLUMNS, body_hash, load_cached_scores, save_cached_scores
+
+# Class boundaries used by calculate_sentiment, from the most negative to the most positive
+POLARITY_LABELS = ["Extremely negative", "Significantly negative", "Fairly negative", "Slightly negative",
+                   "Neutral", "Slightly positive", "Fairly positive", "Significantly positive",
+                   "Extremely positive"]
+NEGATIVE_BOUNDS = [-0.75, -0.5, -0.3, -0.1]
+POSITIVE_BOUNDS = [0.1, 0.3, 0.5, 0.75]
+SUBJECTIVITY_LABELS = ["Objective", "Slightly subjective", "Moderately subjective", "Fairly subjective",
+                       "Extremely subjective"]
+SUBJECTIVITY_BOUNDS = [0.1, 0.3, 0.5, 0.75]
+
+# Batches smaller than this are scored in-process, a process pool costs more than it saves
+MIN_PARALLEL_BATCH = 64
+
+# Units an article can be split into for granular scoring, "document" scores the whole text at once
+SENTIMENT_UNITS = ("document", "paragraph", "sentence")
+PARAGRAPH_PATTERN = re.compile(r"[^\n]+")
+# Chunks of an article scored and aggregated at a time, bounding the memory used on long articles
+CHUNK_BATCH_SIZE = 64
+
+# Sentiment scorers, "textblob" is the reference, "vader" is a faster lexicon and rule based scorer
+SENTIMENT_BACKENDS = ("textblob", "vader")
+
+
+# Getting article content
+def article(url, html=None):
+    """
+    Fetch the content of an article from a given URL
+    Parameters:
+    - url (str): The URL of the article to fetch
+    - html (str): The already downloaded page, skips the download when given
+    Returns:
+    - tuple: A tuple containing the article's text and title
+    """
+    # newspaper is slow to import and only needed when pages are downloaded
+    from newspaper import Article
+    article = Article(url)
+    if html is None:
+        with timed("download", url=url):
+            article.download()
+    else:
+        article.download(input_html=html)
+    with timed("parse", url=url):
+        article.parse()
+    return article.text, article.title
+
+
+def sentiment_analysis(article_text):
+    """
+    Perform sentiment analysis on the article text
+    Parameters:
+    - article_text (str): The text of the article to analyze
+    Returns:
+    - tuple: A tuple containing the polarity, subjectivity, and their classifications
+    """
+    # Perform sentiment analysis on the entire article text, once for both scores
+    polarity, subjectivity = score_text(article_text)
+
+    # Classify the polarity and subjectivity based on calculated values
+    polarity_class = calculate_sentiment(polarity, "polarity")
+    subjectivity_class = calculate_sentiment(subjectivity, "subjectivity")
+
+    return polarity, subjectivity, polarity_class, subjectivity_class
+
+
+# Helper Method to classify polarity and subjectivity
+def calculate_sentiment(value, type):
+    """
+    Classify the polarity or subjectivity value into categories
+    Parameters:
+    - value (float): The polarity or subjectivity value to classify
+    - type (str): The type of value ('polarity' or 'subjectivity')
+    Returns:
+    - str: The classification label for the polarity or subjectivity value
+    """
+    if type == "polarity":
+        if value > 0.75:
+            return "Extremely positive"
+        elif value > 0.5:
+            return "Significantly positive"
+        elif value > 0.3:
+            return "Fairly positive"
+        elif value > 0.1:
+            return "Slightly positive"
+        elif value < -0.75:
+            return "Extremely negative"
+        elif value < -0.5:
+            return "Significantly negative"
+        elif value < -0.3:
+            return "Fairly negative"
+        elif value < -0.1:
+            return "Slightly negative"
+        else:
+            return "Neutral"
+    
+    elif type == "subjectivity":
+        if value > 0.75:
+            return "Extremely subjective"
+        elif value > 0.5:
+            return "Fairly subjective"
+        elif value > 0.3:
+            return "Moderately subjective"
+        elif value > 0.1:
+            return "Slightly subjective"
+        else:
+            return "Objective"
+
+
+def _textblob_scores(texts):
+    from textblob import TextBlob
+    return [tuple(TextBlob(text).sentiment) for text in texts]
+
+
+@lru_cache(maxsize=None)
+def _vader_analyzer():
+    # Loaded once per process, the lexicon takes longer to read than a batch takes to score
+    require("vader_lexicon")
+    use_local_data()
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+def _vader_scores(texts):
+    analyzer = _vader_analyzer()
+    scores = [analyzer.polarity_scores(text) for text in texts]
+    # VADER has no subjectivity score, the share of the text carrying sentiment stands in for it
+    return [(score["compound"], 1.0 - score["neu"]) for score in scores]
+
+
+_SCORERS = {"textblob": _textblob_scores, "vader": _vader_scores}
+
+
+def score_text(text, backend="textblob"):
+    """Return the polarity and subjectivity of a text, scored by a backend of SENTIMENT_BACKENDS"""
+    return _SCORERS[backend]([text])[0]
+
+
+def _score_chunk(texts, backend="textblob"):
+    return _SCORERS[backend](texts)
+
+
+@lru_cache(maxsize=None)
+def _sentence_tokenizer():
+    # Loaded once per process, like the VADER lexicon
+    require("punkt_tab")
+    return use_local_data().tokenize.PunktTokenizer()
+
+
+def iter_chunks(text, unit="sentence"):
+    """
+    Split an article into paragraphs or sentences lazily, one sentence at a time
+    Parameters:
+    - text (str): The text of the article, paragraphs are separated by line breaks (see paragraph_text)
+    - unit (str): "paragraph" or "sentence"
+    Returns:
+    - generator: The non-empty chunks of the text
+    """
+    if unit == "sentence":
+        tokenizer = _sentence_tokenizer()
+    for match in PARAGRAPH_PATTERN.finditer(text):
+        paragraph = match.group().strip()
+        if not paragraph:
+            continue
+        if unit == "paragraph":
+            yield paragraph
+        else:
+            # Sentences are found one at a time, also in a long text without paragraph breaks
+            for start, end in tokenizer.span_tokenize(paragraph):
+                yield paragraph[start:end]
+
+
+def iter_chunk_scores(text, unit="sentence", batch_size=CHUNK_BATCH_SIZE, backend="textblob"):
+    """
+    Score the chunks of an article in batches
+    Parameters:
+    - text (str): The text of the article
+    - unit (str): "paragraph" or "sentence"
+    - batch_size (int): The number of chunks scored per batch
+    - backend (str): The scorer, one of SENTIMENT_BACKENDS
+    Returns:
+    - generator: One array of shape (chunks, 2) with the polarity and subjectivity of every chunk per batch
+    """
+    batch = []
+    for chunk in iter_chunks(text, unit):
+        batch.append(chunk)
+        if len(batch) == batch_size:
+            yield np.array(_score_chunk(batch, backend), dtype=float)
+            batch = []
+    if batch:
+        yield np.array(_score_chunk(batch, backend), dtype=float)
+
+
+def granular_sentiment(text, unit="sentence", batch_size=CHUNK_BATCH_SIZE, backend="textblob"):
+    """
+    Score an article chunk by chunk and aggregate the distribution of the chunk scores
+    Parameters:
+    - text (str): The text of the article
+    - unit (str): "paragraph" or "sentence"
+    - batch_size (int): The number of chunks scored per batch, only running totals are kept between batches
+    - backend (str): The scorer, one of SENTIMENT_BACKENDS
+    Returns:
+    - dict: The mean polarity and subjectivity of the chunks, their number, the share of negative chunks,
+      and the minimum, maximum and variance of their polarity
+    """
+    count, negative = 0, 0
+    polarity_mean, polarity_m2, subjectivity_sum = 0.0, 0.0, 0.0
+    polarity_min, polarity_max = np.inf, -np.inf
+    for scores in iter_chunk_scores(text, unit, batch_size, backend):
+        polarities = scores[:, 0]
+        # Merge the batch into the running mean and squared deviations (Chan et al.)
+        batch_mean = polarities.mean()
+        merged = count + len(polarities)
+        delta = batch_mean - polarity_mean
+        polarity_m2 += ((polarities - batch_mean) ** 2).sum() + delta ** 2 * count * len(polarities) / merged
+        polarity_mean += delta * len(polarities) / merged
+        count = merged
+
+        # Chunks below the upper bound of the negative classes count as negative
+        negative += int((polarities < NEGATIVE_BOUNDS[-1]).sum())
+        subjectivity_sum += scores[:, 1].sum()
+        polarity_min = min(polarity_min, polarities.min())
+        polarity_max = max(polarity_max, polarities.max())
+
+    if count == 0:
+        return {"polarity": 0.0, "subjectivity": 0.0, "chunks": 0, "negative_share": 0.0,
+                "polarity_min": 0.0, "polarity_max": 0.0, "polarity_var": 0.0}
+    return {
+        "polarity": float(polarity_mean),
+        "subjectivity": float(subjectivity_sum / count),
+        "chunks": count,
+        "negative_share": negative / count,
+        "polarity_min": float(polarity_min),
+        "polarity_max": float(polarity_max),
+        "polarity_var": float(polarity_m2 / (count - 1)) if count > 1 else 0.0,
+    }
+
+
+def _score_granular_chunk(texts, unit, backend="textblob"):
+    results = [granular_sentiment(text, unit, backend=backend) for text in texts]
+    return [tuple(result[column] for column in ["polarity", "subjectivity", *GRANULAR_COLUMNS])
+            for result in results]
+
+
+def classify_polarity(values):
+    """
+    Classify a whole array of polarity values at once, with the same classes as calculate_sentiment
+    Parameters:
+    - values (array-like): Polarity scores
+    Returns:
+    - pd.Categorical: The polarity class of every score
+    """
+    values = np.asarray(values, dtype=float)
+    # Negative bounds are exclusive ("< -0.1") and positive ones inclusive ("> 0.1" is the next class),
+    # so the two halves are binned separately and the bin numbers added up
+    codes = np.digitize(values, NEGATIVE_BOUNDS) + np.digitize(values, POSITIVE_BOUNDS, right=True)
+    return pd.Categorical.from_codes(codes, categories=POLARITY_LABELS)
+
+
+def classify_subjectivity(values):
+    """
+    Classify a whole array of subjectivity values at once, with the same classes as calculate_sentiment
+    Parameters:
+    - values (array-like): Subjectivity scores
+    Returns:
+    - pd.Categorical: The subjectivity class of every score
+    """
+    codes = np.digitize(np.asarray(values, dtype=float), SUBJECTIVITY_BOUNDS, right=True)
+    return pd.Categorical.from_codes(codes, categories=SUBJECTIVITY_LABELS)
+
+
+def score_batch(texts, workers=None, chunksize=32, unit="document", backend="textblob", store=None):
+    """
+    Score the sentiment of many texts, spread over a process pool for large batches
+    Parameters:
+    - texts (list): The texts to score
+    - workers (int): The number of worker processes, defaults to the number of CPUs
+    - chunksize (int): The number of texts sent to a worker at a time
+    - unit (str): "document" scores every text as a whole, "paragraph" or "sentence" score its chunks and
+      average them, see granular_sentiment
+    - backend (str): The scorer, one of SENTIMENT_BACKENDS
+    - store (sqlite3.Connection): Optional article store caching the scores of every backend and unit by
+      body hash, only the texts it has no scores for are scored
+    Returns:
+    - pd.DataFrame: The polarity, subjectivity, polarity_class and subjectivity_class of every text, in order,
+      plus the GRANULAR_COLUMNS in granular mode, with the throughput in articles/sec and the number of cache
+      hits in its attrs
+    """
+    if unit not in SENTIMENT_UNITS:
+        raise ValueError(f"Unknown sentiment unit {unit!r}, expected one of {', '.join(SENTIMENT_UNITS)}")
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {backend!r}, expected one of {', '.join(SENTIMENT_BACKENDS)}")
+    texts = list(texts)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    # Texts already scored by this backend, e.g. when comparing backends on the same corpus, are not scored again
+    hashes = [body_hash(text) for text in texts] if store is not None else []
+    cached = load_cached_scores(store, backend, unit, hashes) if store is not None else {}
+    missing = [i for i in range(len(texts)) if not hashes or hashes[i] not in cached]
+    pending = [texts[i] for i in missing]
+
+    if unit == "document":
+        score_chunk = partial(_score_chunk, backend=backend)
+    else:
+        score_chunk = partial(_score_granular_chunk, unit=unit, backend=backend)
+    chunks = [pending[i:i + chunksize] for i in range(0, len(pending), chunksize)]
+    if workers == 1 or len(pending) < MIN_PARALLEL_BATCH:
+        new_scores = [score for chunk in chunks for score in score_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            new_scores = [score for chunk_scores in executor.map(score_chunk, chunks) for score in chunk_scores]
+
+    if store is not None:
+        save_cached_scores(store, backend, unit, {hashes[i]: score for i, score in zip(missing, new_scores)})
+        scores = [cached.get(text_hash) for text_hash in hashes]
+        for i, score in zip(missing, new_scores):
+            scores[i] = score
+    else:
+        scores = new_scores
+
+    columns = ["polarity", "subjectivity"] if unit == "document" else ["polarity", "subjectivity", *GRANULAR_COLUMNS]
+    scores = pd.DataFrame(np.array(scores, dtype=float).reshape(-1, len(columns)), columns=columns)
+    df = pd.DataFrame({
+        "polarity": scores["polarity"],
+        "subjectivity": scores["subjectivity"],
+        "polarity_class": classify_polarity(scores["polarity"]),
+        "subjectivity_class": classify_subjectivity(scores["subjectivity"]),
+    })
+    for column in scores.columns.intersection(GRANULAR_COLUMNS):
+        df[column] = scores[column]
+    if "chunks" in df:
+        df["chunks"] = df["chunks"].astype(int)
+
+    elapsed = time.perf_counter() - start
+    df.attrs["articles_per_sec"] = len(texts) / elapsed if elapsed > 0 else float("inf")
+    df.attrs["cache_hits"] = len(texts) - len(pending)
+    count("scored_articles", len(pending), backend=backend)
+    count("score_cache_hits", len(texts) - len(pending), backend=backend)
+    count("score_seconds", elapsed, backend=backend)
+    if texts:
+        print(f"Scored {len(texts)} articles with {backend} in {elapsed:.2f}s "
+              f"({df.attrs['articles_per_sec']:.1f} articles/sec, {df.attrs['cache_hits']} cached)")
+    return df
@@ -0,0 +1,97 @@
+import argparse
+import os
+
+# Local directory the NLTK data is provisioned into, searched before NLTK's default locations
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", os.path.join("data", "nltk_data"))
+
+# NLTK packages used by the pipeline and the path each one is found under
+NLTK_RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+    "punkt_tab": "tokenizers/punkt_tab",
+    # Only used by the "vader" sentiment backend
+    "vader_lexicon": "sentiment/vader_lexicon.zip",
+}
+
+# Packages already found, so require() is cheap on hot paths
+_installed = set()
+
+
+def use_local_data(data_dir=NLTK_DATA_DIR):
+    """
+    Make NLTK look up its data in the local data directory first
+    Parameters:
+    - data_dir (str): The local NLTK data directory
+    Returns:
+    - module: The nltk module
+    """
+    import nltk
+    data_dir = os.path.abspath(data_dir)
+    if data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir)
+    return nltk
+
+
+def missing_resources(names=NLTK_RESOURCES, data_dir=NLTK_DATA_DIR):
+    """
+    List the NLTK packages that are not installed
+    Parameters:
+    - names (iterable): The packages to check, keys of NLTK_RESOURCES
+    - data_dir (str): The local NLTK data directory
+    Returns:
+    - list: The names of the missing packages
+    """
+    nltk = use_local_data(data_dir)
+    missing = []
+    for name in names:
+        if name in _installed:
+            continue
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+            _installed.add(name)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+
+def require(*names):
+    """
+    Check that NLTK packages are installed before they are used
+    Parameters:
+    - names (str): The packages needed, keys of NLTK_RESOURCES
+    Returns:
+    - None: Raises LookupError naming the setup command when a package is missing
+    """
+    missing = missing_resources(names)
+    if missing:
+        raise LookupError(f"Missing NLTK data: {', '.join(missing)}. Run `python refresh.py --setup` to install "
+                          f"it into {NLTK_DATA_DIR}.")
+
+
+def setup(data_dir=NLTK_DATA_DIR):
+    """
+    Download the NLTK packages that are not installed yet into the local data directory, safe to run repeatedly
+    Parameters:
+    - data_dir (str): The local NLTK data directory
+    Returns:
+    - list: The names of the packages that were downloaded
+    """
+    missing = missing_resources(data_dir=data_dir)
+    if not missing:
+        print("NLTK data already installed")
+        return []
+
+    nltk = use_local_data(data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    for name in missing:
+        if not nltk.download(name, download_dir=data_dir, quiet=True):
+            raise RuntimeError(f"Could not download the NLTK package {name!r}")
+        print(f"Installed {name} into {data_dir}")
+    return missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Install the NLTK data used by the pipeline")
+    parser.add_argument("--data-dir", default=NLTK_DATA_DIR, help="directory the NLTK data is installed into")
+    args = parser.parse_args()
+    setup(args.data_dir)
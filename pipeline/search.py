@@ -0,0 +1,96 @@
+import re
+
+import pandas as pd
+
+# Results shown per page of the search view
+SEARCH_PAGE_SIZE = 20
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query matching the articles that contain every word
+    Parameters:
+    - query (str): The words typed by the user, FTS5 operators and punctuation are ignored
+    Returns:
+    - str: The FTS5 query, or None when there is no word
+    """
+    words = WORD_PATTERN.findall(query or "")
+    if not words:
+        return None
+    # Quoted words are taken literally, so "NOT" or "near" are searched for instead of parsed
+    return " ".join(f'"{word}"' for word in words)
+
+
+def _filters(query=None, subjects=None, polarity_classes=None, subjectivity_classes=None):
+    # FROM and WHERE clauses shared by the results, their total and the facet counts
+    match = match_expression(query)
+    source = "articles"
+    clauses = []
+    params = []
+    if match is not None:
+        source = "article_search JOIN articles ON articles.rowid = article_search.rowid"
+        clauses.append("article_search MATCH ?")
+        params.append(match)
+    if subjects:
+        clauses.append(f"articles.url IN (SELECT url FROM subject_articles WHERE subject IN "
+                       f"({', '.join('?' * len(subjects))}))")
+        params.extend(subjects)
+    for column, values in (("polarity_class", polarity_classes), ("subjectivity_class", subjectivity_classes)):
+        if values:
+            clauses.append(f"articles.{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"FROM {source} {where}", params, match is not None
+
+
+def search_articles(store, query=None, subjects=None, polarity_classes=None, subjectivity_classes=None, page=1,
+                    page_size=SEARCH_PAGE_SIZE):
+    """
+    Find the stored articles matching words and filters, one page at a time
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - query (str): Words the title or the preprocessed text must contain, stemmed so "elections" finds
+      "election", None lists every article
+    - subjects (list): Only articles of these subjects, all subjects when empty
+    - polarity_classes (list): Only articles in these polarity classes, all classes when empty
+    - subjectivity_classes (list): Only articles in these subjectivity classes, all classes when empty
+    - page (int): The page to return, from 1
+    - page_size (int): The number of articles per page
+    Returns:
+    - pd.DataFrame: The articles of the page, best matches (or newest articles) first, with their subjects
+    """
+    source, params, ranked = _filters(query, subjects, polarity_classes, subjectivity_classes)
+    order = "article_search.rank" if ranked else "articles.published DESC"
+    return pd.read_sql_query(f"""
+        SELECT articles.title, articles.published, articles.polarity, articles.polarity_class,
+               articles.subjectivity, articles.subjectivity_class, articles.url,
+               (SELECT GROUP_CONCAT(subject, ', ') FROM subject_articles
+                WHERE subject_articles.url = articles.url) AS subjects
+        {source} ORDER BY {order} LIMIT ? OFFSET ?
+    """, store, params=[*params, page_size, (page - 1) * page_size])
+
+
+def count_matches(store, query=None, subjects=None, polarity_classes=None, subjectivity_classes=None):
+    """Count the stored articles matching words and filters, see search_articles"""
+    source, params, _ = _filters(query, subjects, polarity_classes, subjectivity_classes)
+    return store.execute(f"SELECT COUNT(*) {source}", params).fetchone()[0]
+
+
+def facet_counts(store, query=None, subjects=None):
+    """
+    Count the articles matching words in every sentiment class
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - query (str): Words the articles must contain, see search_articles
+    - subjects (list): Only articles of these subjects, all subjects when empty
+    Returns:
+    - dict: For "polarity_class" and "subjectivity_class", the number of matching articles in each class
+    """
+    source, params, _ = _filters(query, subjects)
+    return {
+        column: dict(store.execute(f"SELECT articles.{column}, COUNT(*) {source} GROUP BY articles.{column}",
+                                   params).fetchall())
+        for column in ("polarity_class", "subjectivity_class")
+    }
@@ -0,0 +1,623 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import pandas as pd
+
+STORE_PATH = os.getenv("ARTICLE_STORE", os.path.join("data", "articles.db"))
+
+# Seconds a subject's article list is served from the store without asking the API again
+CACHE_TTL = int(os.getenv("CACHE_TTL", 60 * 60))
+# Articles no subject lists any more (e.g. after a --full refresh) are evicted this many seconds after being fetched,
+# the articles of the subjects and every backfilled article are kept as their history
+ARTICLE_TTL = int(os.getenv("ARTICLE_TTL", 30 * 24 * 60 * 60))
+# Upper bound on those unlisted articles, the ones fetched longest ago are evicted first
+CACHE_MAX_ARTICLES = int(os.getenv("CACHE_MAX_ARTICLES", 10000))
+
+# Bump when the tables change, older stores are then rebuilt from scratch
+SCHEMA_VERSION = 9
+
+# Distribution of the chunk scores of an article, only filled when articles are scored by paragraph or sentence
+GRANULAR_COLUMNS = ["chunks", "negative_share", "polarity_min", "polarity_max", "polarity_var"]
+RECORD_COLUMNS = ["title", "content", "url", "canonical_url", "published", "polarity", "subjectivity", "polarity_class",
+                  "subjectivity_class", *GRANULAR_COLUMNS, "tokens", "term_counts"]
+
+# Compact column types of the articles shown by the dashboard, Arrow strings instead of Python objects, float32
+# scores and categorical labels
+ARTICLE_COLUMN_DTYPES = {"title": "string[pyarrow]", "url": "string[pyarrow]", "published": "string[pyarrow]",
+                         "polarity": "float32", "subjectivity": "float32", "polarity_class": "category",
+                         "subjectivity_class": "category"}
+
+# Time buckets of the sentiment rollups, weeks start on Monday
+ROLLUP_PERIODS = ("day", "week")
+
+# Number of refresh runs whose metrics are kept
+RUN_HISTORY = int(os.getenv("RUN_HISTORY", 100))
+
+
+def open_store(path=STORE_PATH):
+    """
+    Open the article store, creating it if needed
+    Parameters:
+    - path (str): The SQLite file holding the store
+    Returns:
+    - sqlite3.Connection: The open store
+    """
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    store = sqlite3.connect(path)
+    store.row_factory = sqlite3.Row
+    # Readers see the last committed state while a refresh writes, instead of waiting for its lock
+    store.execute("PRAGMA journal_mode = WAL")
+
+    if store.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        store.executescript("""
+            DROP TABLE IF EXISTS articles;
+            DROP TABLE IF EXISTS subject_articles;
+            DROP TABLE IF EXISTS subjects;
+            DROP TABLE IF EXISTS subject_terms;
+            DROP TABLE IF EXISTS subject_rollups;
+            DROP TABLE IF EXISTS article_signatures;
+            DROP TABLE IF EXISTS lsh_bands;
+            DROP TABLE IF EXISTS pipeline_runs;
+            DROP TABLE IF EXISTS article_search;
+            DROP TABLE IF EXISTS sentiment_cache;
+            DROP TABLE IF EXISTS backfilled_articles;
+        """)
+    search_exists = store.execute("SELECT 1 FROM sqlite_master WHERE name = 'article_search'").fetchone()
+    store.executescript(f"""
+        CREATE TABLE IF NOT EXISTS articles (
+            url TEXT PRIMARY KEY,
+            body_hash TEXT NOT NULL,
+            title TEXT,
+            content TEXT,
+            canonical_url TEXT,
+            published TEXT,
+            polarity REAL,
+            subjectivity REAL,
+            polarity_class TEXT,
+            subjectivity_class TEXT,
+            chunks INTEGER,
+            negative_share REAL,
+            polarity_min REAL,
+            polarity_max REAL,
+            polarity_var REAL,
+            tokens TEXT,
+            term_counts TEXT,
+            fetched_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS articles_fetched_at ON articles (fetched_at);
+        CREATE INDEX IF NOT EXISTS articles_published ON articles (published);
+        CREATE TABLE IF NOT EXISTS subject_articles (
+            subject TEXT NOT NULL,
+            url TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (subject, url)
+        );
+        CREATE INDEX IF NOT EXISTS subject_articles_url ON subject_articles (url);
+        CREATE TABLE IF NOT EXISTS backfilled_articles (
+            subject TEXT NOT NULL,
+            url TEXT NOT NULL,
+            PRIMARY KEY (subject, url)
+        );
+        CREATE TABLE IF NOT EXISTS subjects (
+            subject TEXT PRIMARY KEY,
+            refreshed_at REAL NOT NULL,
+            newest_published TEXT,
+            newest_url TEXT
+        );
+        CREATE TABLE IF NOT EXISTS subject_terms (
+            subject TEXT NOT NULL,
+            term TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (subject, term)
+        );
+        CREATE TABLE IF NOT EXISTS subject_rollups (
+            subject TEXT NOT NULL,
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            polarity_mean REAL NOT NULL,
+            polarity_m2 REAL NOT NULL,
+            subjectivity_mean REAL NOT NULL,
+            subjectivity_m2 REAL NOT NULL,
+            polarity_classes TEXT NOT NULL,
+            subjectivity_classes TEXT NOT NULL,
+            PRIMARY KEY (subject, period, bucket)
+        );
+        CREATE TABLE IF NOT EXISTS article_signatures (
+            url TEXT PRIMARY KEY,
+            signature BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS lsh_bands (
+            band INTEGER NOT NULL,
+            key INTEGER NOT NULL,
+            url TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS lsh_bands_key ON lsh_bands (band, key);
+        CREATE INDEX IF NOT EXISTS lsh_bands_url ON lsh_bands (url);
+        CREATE TABLE IF NOT EXISTS pipeline_runs (
+            started_at REAL PRIMARY KEY,
+            finished_at REAL NOT NULL,
+            summary TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sentiment_cache (
+            backend TEXT NOT NULL,
+            unit TEXT NOT NULL,
+            body_hash TEXT NOT NULL,
+            scores TEXT NOT NULL,
+            PRIMARY KEY (backend, unit, body_hash)
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS article_search USING fts5 (
+            title, tokens, content='articles', content_rowid='rowid', tokenize='porter unicode61'
+        );
+        PRAGMA user_version = {SCHEMA_VERSION};
+    """)
+    if search_exists is None:
+        # Index the articles saved before the search index existed
+        store.execute("INSERT INTO article_search (article_search) VALUES ('rebuild')")
+        store.commit()
+    return store
+
+
+def open_reader(path=STORE_PATH):
+    """
+    Open the article store read-only, without creating or migrating it, for the dashboard
+    Parameters:
+    - path (str): The SQLite file holding the store
+    Returns:
+    - sqlite3.Connection: The open store, or None until refresh.py has written a store of the current version
+    """
+    if not os.path.exists(path):
+        return None
+    store = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    store.row_factory = sqlite3.Row
+    if store.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        store.close()
+        return None
+    return store
+
+
+def body_hash(text):
+    """Return a stable hash of an article body"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _to_record(row):
+    record = {column: row[column] for column in RECORD_COLUMNS}
+    record["term_counts"] = json.loads(record["term_counts"])
+    return record
+
+
+def cached_record(store, url, text=None):
+    """
+    Look up a scored article
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - url (str): The URL of the article
+    - text (str): The current body of the article, a cached record with a different body is ignored
+    Returns:
+    - dict: The stored article record, or None when it has to be scored again
+    """
+    row = store.execute("SELECT * FROM articles WHERE url = ?", (url,)).fetchone()
+    if row is None or (text is not None and row["body_hash"] != body_hash(text)):
+        return None
+    return _to_record(row)
+
+
+def _unindex_articles(store, where, params=((),)):
+    # The search index reads the articles table, an entry is removed by passing back the values it indexed
+    store.executemany(f"""
+        INSERT INTO article_search (article_search, rowid, title, tokens)
+        SELECT 'delete', rowid, title, tokens FROM articles WHERE {where}
+    """, params)
+
+
+def save_records(store, records):
+    """Insert or update scored article records, keeping the search index in sync"""
+    now = time.time()
+    urls = [(record["url"],) for record in records]
+    _unindex_articles(store, "url = ?", urls)
+    store.executemany(
+        "INSERT OR REPLACE INTO articles VALUES (:url, :body_hash, :title, :content, :canonical_url, :published,"
+        " :polarity, :subjectivity, :polarity_class, :subjectivity_class, :chunks, :negative_share,"
+        " :polarity_min, :polarity_max, :polarity_var, :tokens, :term_counts, :now)",
+        [{**dict.fromkeys(RECORD_COLUMNS), **record, "body_hash": body_hash(record["content"]),
+          "term_counts": json.dumps(record["term_counts"]),
+          "now": now} for record in records]
+    )
+    store.executemany("INSERT INTO article_search (rowid, title, tokens) SELECT rowid, title, tokens FROM articles "
+                      "WHERE url = ?", urls)
+    store.commit()
+
+
+def load_cached_scores(store, backend, unit, hashes):
+    """
+    Look up the sentiment scores of article bodies already scored by a backend
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - backend (str): The sentiment backend, e.g. "textblob"
+    - unit (str): The scoring unit, "document", "paragraph" or "sentence"
+    - hashes (list): The body hashes of the texts
+    Returns:
+    - dict: The scores of every hash found, as a tuple of polarity, subjectivity and the GRANULAR_COLUMNS
+      for granular units
+    """
+    hashes = list(set(hashes))
+    cached = {}
+    # Bounded batches stay under SQLite's limit on query parameters
+    for start in range(0, len(hashes), 500):
+        batch = hashes[start:start + 500]
+        rows = store.execute(f"""
+            SELECT body_hash, scores FROM sentiment_cache
+            WHERE backend = ? AND unit = ? AND body_hash IN ({", ".join("?" * len(batch))})
+        """, [backend, unit, *batch])
+        cached.update((row["body_hash"], tuple(json.loads(row["scores"]))) for row in rows)
+    return cached
+
+
+def save_cached_scores(store, backend, unit, scores):
+    """
+    Keep the sentiment scores of article bodies, see load_cached_scores
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - backend (str): The sentiment backend
+    - unit (str): The scoring unit
+    - scores (dict): The scores of every body hash
+    Returns:
+    - None
+    """
+    store.executemany("INSERT OR REPLACE INTO sentiment_cache VALUES (?, ?, ?, ?)",
+                      [(backend, unit, text_hash, json.dumps([float(value) for value in score]))
+                       for text_hash, score in scores.items()])
+    store.commit()
+
+
+def save_subject(store, subject, records, newest=None, append=False, older=False):
+    """
+    Link saved articles to a subject and mark the subject as refreshed
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject (str): The name of the subject, e.g. "Harris"
+    - records (list): The article records of the subject, already saved, newest first
+    - newest (dict): The newest API result seen, recorded as the high-water mark of the subject
+    - append (bool): Put the records in front of the stored ones instead of replacing them
+    - older (bool): Put the records after the stored ones instead, for backfilled articles older than them, which
+      stay listed when a full refresh replaces the others and are never evicted, see evict
+    Returns:
+    - None
+    """
+    if older:
+        first = store.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM subject_articles WHERE subject = ?",
+                              (subject,)).fetchone()[0]
+        store.executemany("INSERT OR IGNORE INTO backfilled_articles VALUES (?, ?)",
+                          [(subject, record["url"]) for record in records])
+    else:
+        if not append:
+            # A full refresh replaces the list, except for the backfilled articles, which no refresh fetches again
+            store.execute("""
+                DELETE FROM subject_articles WHERE subject = :subject
+                AND url NOT IN (SELECT url FROM backfilled_articles WHERE subject = :subject)
+            """, {"subject": subject})
+            store.execute("DELETE FROM subject_terms WHERE subject = ?", (subject,))
+            store.execute("DELETE FROM subject_rollups WHERE subject = ?", (subject,))
+            kept = [{**dict(row), "term_counts": json.loads(row["term_counts"])} for row in store.execute("""
+                SELECT term_counts, published, polarity, subjectivity, polarity_class, subjectivity_class
+                FROM subject_articles JOIN articles ON articles.url = subject_articles.url
+                WHERE subject = ?
+            """, (subject,))]
+            _update_subject_terms(store, subject, [record["term_counts"] for record in kept])
+            _update_rollups(store, subject, kept)
+        # The new records are listed in front of the stored ones
+        first = store.execute("SELECT COALESCE(MIN(position), 0) FROM subject_articles WHERE subject = ?",
+                              (subject,)).fetchone()[0] - len(records)
+
+    linked = []
+    for position, record in enumerate(records):
+        if store.execute("INSERT OR IGNORE INTO subject_articles VALUES (?, ?, ?)",
+                         (subject, record["url"], first + position)).rowcount:
+            linked.append(record)
+    # The term counts and rollups of the subject are kept up to date with the articles linked to it
+    _update_subject_terms(store, subject, [record["term_counts"] for record in linked])
+    _update_rollups(store, subject, linked)
+
+    # Keep the previous high-water mark when nothing newer came in
+    store.execute("""
+        INSERT INTO subjects VALUES (:subject, :now, :published, :url)
+        ON CONFLICT (subject) DO UPDATE SET
+            refreshed_at = excluded.refreshed_at,
+            newest_published = COALESCE(excluded.newest_published, newest_published),
+            newest_url = COALESCE(excluded.newest_url, newest_url)
+    """, {"subject": subject, "now": time.time(),
+          "published": newest["webPublicationDate"] if newest else None,
+          "url": newest["webUrl"] if newest else None})
+    store.commit()
+
+
+def _update_subject_terms(store, subject, term_counts):
+    counts = Counter()
+    for article_counts in term_counts:
+        counts.update(article_counts)
+    store.executemany("""
+        INSERT INTO subject_terms VALUES (?, ?, ?)
+        ON CONFLICT (subject, term) DO UPDATE SET count = count + excluded.count
+    """, [(subject, term, count) for term, count in counts.items()])
+
+
+def rollup_bucket(published, period):
+    """
+    Return the time bucket of an article
+    Parameters:
+    - published (str): The webPublicationDate of the article, e.g. "2024-10-02T15:04:05Z"
+    - period (str): "day" or "week"
+    Returns:
+    - str: The day, or the Monday of the week, the article was published in, e.g. "2024-09-30"
+    """
+    day = date.fromisoformat(published[:10])
+    if period == "week":
+        day -= timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+def _merge_moments(total, part):
+    # Chan et al.'s pairwise update of (count, mean, sum of squared deviations)
+    count, mean, m2 = total
+    part_count, part_mean, part_m2 = part
+    merged = count + part_count
+    delta = part_mean - mean
+    return merged, mean + delta * part_count / merged, m2 + part_m2 + delta ** 2 * count * part_count / merged
+
+
+def _moments(values):
+    mean = sum(values) / len(values)
+    return len(values), mean, sum((value - mean) ** 2 for value in values)
+
+
+def _update_rollups(store, subject, records):
+    # Group the records by bucket first, so each rollup row is read and written once per batch
+    batches = {}
+    for record in records:
+        if record["published"]:
+            for period in ROLLUP_PERIODS:
+                batches.setdefault((period, rollup_bucket(record["published"], period)), []).append(record)
+
+    for (period, bucket), batch in batches.items():
+        row = store.execute("SELECT * FROM subject_rollups WHERE subject = ? AND period = ? AND bucket = ?",
+                            (subject, period, bucket)).fetchone()
+        if row is None:
+            row = {"count": 0, "polarity_mean": 0.0, "polarity_m2": 0.0, "subjectivity_mean": 0.0,
+                   "subjectivity_m2": 0.0, "polarity_classes": "{}", "subjectivity_classes": "{}"}
+        merged = {}
+        for score in ("polarity", "subjectivity"):
+            count, merged[f"{score}_mean"], merged[f"{score}_m2"] = _merge_moments(
+                (row["count"], row[f"{score}_mean"], row[f"{score}_m2"]),
+                _moments([record[score] for record in batch]))
+            classes = Counter(json.loads(row[f"{score}_classes"]))
+            for record in batch:
+                classes[record[f"{score}_class"]] += 1
+            merged[f"{score}_classes"] = json.dumps(classes)
+
+        store.execute("""
+            INSERT OR REPLACE INTO subject_rollups VALUES (:subject, :period, :bucket, :count, :polarity_mean,
+                :polarity_m2, :subjectivity_mean, :subjectivity_m2, :polarity_classes, :subjectivity_classes)
+        """, {"subject": subject, "period": period, "bucket": bucket, "count": count, **merged})
+
+
+def load_rollups(store, subject_names, period="day"):
+    """
+    Load the sentiment rollups of several subjects, maintained as articles are linked to them
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject_names (list): The names of the subjects
+    - period (str): "day" or "week"
+    Returns:
+    - pd.DataFrame: One row per subject and bucket with the article count, the mean and variance of both
+      scores, and one count column per sentiment class
+    """
+    rollups = pd.read_sql_query(f"""
+        SELECT * FROM subject_rollups WHERE period = ? AND subject IN ({", ".join("?" * len(subject_names))})
+        ORDER BY bucket
+    """, store, params=[period, *subject_names])
+    rollups["subject"] = pd.Categorical(rollups["subject"], categories=list(subject_names))
+    rollups["bucket"] = pd.to_datetime(rollups["bucket"])
+    for score in ("polarity", "subjectivity"):
+        # Sample variance, 0 for buckets holding a single article
+        rollups[f"{score}_var"] = rollups[f"{score}_m2"] / (rollups["count"] - 1).clip(lower=1)
+        classes = pd.DataFrame([json.loads(counts) for counts in rollups[f"{score}_classes"]],
+                               index=rollups.index)
+        rollups = rollups.join(classes.fillna(0).astype(int))
+    return rollups.drop(columns=["period", "polarity_m2", "subjectivity_m2", "polarity_classes",
+                                 "subjectivity_classes"])
+
+
+def subject_term_counts(store, subject, limit=None):
+    """
+    Return the term counts of all the articles of a subject
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject (str): The name of the subject
+    - limit (int): Only return the limit most frequent terms
+    Returns:
+    - dict: The count of every term, most frequent first
+    """
+    rows = store.execute("SELECT term, count FROM subject_terms WHERE subject = ? ORDER BY count DESC LIMIT ?",
+                         (subject, -1 if limit is None else limit))
+    return {row["term"]: row["count"] for row in rows}
+
+
+def high_water_mark(store, subject):
+    """
+    Return the newest article ingested for a subject
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject (str): The name of the subject
+    Returns:
+    - tuple: The webPublicationDate and webUrl of the newest article, or None before the first run
+    """
+    row = store.execute("SELECT newest_published, newest_url FROM subjects WHERE subject = ?",
+                        (subject,)).fetchone()
+    if row is None or row["newest_published"] is None:
+        return None
+    return row["newest_published"], row["newest_url"]
+
+
+def subject_is_fresh(store, subject, ttl=CACHE_TTL):
+    """Return True if the subject was refreshed less than ttl seconds ago"""
+    row = store.execute("SELECT refreshed_at FROM subjects WHERE subject = ?", (subject,)).fetchone()
+    return row is not None and time.time() - row["refreshed_at"] < ttl
+
+
+def last_refreshed(store):
+    """Return the time of the most recent refresh as a Unix timestamp, or None for an empty store"""
+    return store.execute("SELECT MAX(refreshed_at) FROM subjects").fetchone()[0]
+
+
+def save_run(store, summary):
+    """
+    Keep the metrics of a refresh run, dropping the runs older than the last RUN_HISTORY
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - summary (dict): The summary returned by RunMetrics.summary
+    Returns:
+    - None
+    """
+    store.execute("INSERT OR REPLACE INTO pipeline_runs VALUES (?, ?, ?)",
+                  (summary["started_at"], summary["finished_at"], json.dumps(summary)))
+    store.execute("""
+        DELETE FROM pipeline_runs WHERE started_at NOT IN (
+            SELECT started_at FROM pipeline_runs ORDER BY started_at DESC LIMIT ?
+        )
+    """, (RUN_HISTORY,))
+    store.commit()
+
+
+def latest_run(store):
+    """Return the metrics summary of the most recent refresh run, or None before the first one"""
+    row = store.execute("SELECT summary FROM pipeline_runs ORDER BY started_at DESC LIMIT 1").fetchone()
+    return json.loads(row["summary"]) if row is not None else None
+
+
+def iter_subject(store, subject):
+    """
+    Read the stored articles of a subject one at a time, without loading them all into memory
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject (str): The name of the subject
+    Returns:
+    - generator: The article records, in the order they were saved
+    """
+    rows = store.execute("""
+        SELECT articles.* FROM subject_articles
+        JOIN articles ON articles.url = subject_articles.url
+        WHERE subject = ? ORDER BY position
+    """, (subject,))
+    for row in rows:
+        yield _to_record(row)
+
+
+def load_subject(store, subject):
+    """
+    Load the stored articles of a subject
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject (str): The name of the subject
+    Returns:
+    - list: The article records, in the order they were saved
+    """
+    return list(iter_subject(store, subject))
+
+
+def load_article_columns(store, subject):
+    """
+    Load the stored articles of a subject as compact columns, leaving their bodies in the store
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject (str): The name of the subject
+    Returns:
+    - pd.DataFrame: One row per article, in the order they were saved, with the columns of ARTICLE_COLUMN_DTYPES,
+      see load_body for the text of an article
+    """
+    return pd.read_sql_query(f"""
+        SELECT {", ".join(f"articles.{column}" for column in ARTICLE_COLUMN_DTYPES)} FROM subject_articles
+        JOIN articles ON articles.url = subject_articles.url
+        WHERE subject = ? ORDER BY position
+    """, store, params=(subject,), dtype=ARTICLE_COLUMN_DTYPES)
+
+
+def load_body(store, url):
+    """
+    Read the text of a stored article, only when it is shown
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - url (str): The URL of the article
+    Returns:
+    - str: The text of the article, or None when it is no longer stored
+    """
+    row = store.execute("SELECT content FROM articles WHERE url = ?", (url,)).fetchone()
+    return row["content"] if row is not None else None
+
+
+def load_scores(store, subject_names):
+    """
+    Load the sentiment scores of the stored articles of several subjects as columns, without the article texts
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subject_names (list): The names of the subjects
+    Returns:
+    - pd.DataFrame: One row per distinct article body of each subject, near-duplicates counted once, with a
+      categorical subject column, polarity, subjectivity and cross_listed, True for bodies listed under
+      several of the subjects
+    """
+    scores = pd.read_sql_query(f"""
+        SELECT subject, COALESCE(canonical_url, articles.url) AS canonical, polarity, subjectivity
+        FROM subject_articles JOIN articles ON articles.url = subject_articles.url
+        WHERE subject IN ({", ".join("?" * len(subject_names))})
+        GROUP BY subject, canonical ORDER BY subject, MIN(position)
+    """, store, params=list(subject_names))
+    scores["cross_listed"] = scores.groupby("canonical")["subject"].transform("nunique") > 1
+    scores["subject"] = pd.Categorical(scores["subject"], categories=list(subject_names))
+    return scores.drop(columns="canonical").astype({"polarity": "float32", "subjectivity": "float32"})
+
+
+def evict(store, ttl=ARTICLE_TTL, max_articles=CACHE_MAX_ARTICLES):
+    """
+    Drop the articles no subject lists that were fetched more than ttl seconds ago, then the ones fetched longest
+    ago above max_articles, the articles of the subjects and the backfilled ones are never evicted
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - ttl (float): Maximum age of an unlisted article in seconds
+    - max_articles (int): Maximum number of unlisted articles kept
+    Returns:
+    - int: The number of evicted articles
+    """
+    store.execute("CREATE TEMP TABLE IF NOT EXISTS evicted (url TEXT PRIMARY KEY)")
+    store.execute("DELETE FROM evicted")
+    cutoff = time.time() - ttl
+    store.execute("""
+        WITH unlisted AS (
+            SELECT url, fetched_at FROM articles
+            WHERE url NOT IN (SELECT url FROM subject_articles) AND url NOT IN (SELECT url FROM backfilled_articles)
+        )
+        INSERT INTO evicted
+        SELECT url FROM unlisted WHERE fetched_at < :cutoff
+        UNION
+        SELECT url FROM (
+            SELECT url FROM unlisted WHERE fetched_at >= :cutoff ORDER BY fetched_at DESC LIMIT -1 OFFSET :kept
+        )
+    """, {"cutoff": cutoff, "kept": max_articles})
+
+    store.execute("DELETE FROM article_signatures WHERE url IN (SELECT url FROM evicted)")
+    store.execute("DELETE FROM lsh_bands WHERE url IN (SELECT url FROM evicted)")
+    _unindex_articles(store, "url IN (SELECT url FROM evicted)")
+    store.execute("""
+        DELETE FROM sentiment_cache WHERE body_hash IN (
+            SELECT body_hash FROM articles WHERE url IN (SELECT url FROM evicted)
+        )
+    """)
+    evicted = store.execute("DELETE FROM articles WHERE url IN (SELECT url FROM evicted)").rowcount
+    store.commit()
+    return evicted
@@ -0,0 +1,34 @@
+import json
+import os
+
+SUBJECTS_FILE = os.getenv("SUBJECTS_FILE", "subjects.json")
+
+# Colors given to subjects that do not set one
+DEFAULT_COLORS = ["red", "blue", "green", "orange", "purple", "brown", "teal", "gray"]
+
+
+def load_subjects(path=SUBJECTS_FILE):
+    """
+    Load the subjects to analyze from a JSON config file
+    Each subject has a "name" and either a Guardian "section" (e.g. "us-news/donaldtrump") or a search
+    "query" (e.g. "\\"Tim Walz\\""), plus an optional plot "color"
+    Parameters:
+    - path (str): The JSON file listing the subjects
+    Returns:
+    - list: The subjects as dicts with name, section, query and color keys
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    subjects = []
+    for i, entry in enumerate(config):
+        if "name" not in entry or not ("section" in entry or "query" in entry):
+            raise ValueError(f"Error: subject {i} in {path} needs a 'name' and a 'section' or 'query'.")
+        subjects.append({
+            "name": entry["name"],
+            # Queries go through the search endpoint, which covers the whole site
+            "section": entry.get("section", "search"),
+            "query": entry.get("query"),
+            "color": entry.get("color", DEFAULT_COLORS[i % len(DEFAULT_COLORS)]),
+        })
+    return subjects
@@ -0,0 +1,15 @@
+import threading
+
+import pytest
+
+from stub_server import StubServer
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    thread = threading.Thread(target=server.server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
@@ -0,0 +1,55 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def guardian_html(title, paragraphs):
+    """Build a minimal article page shaped like a Guardian article"""
+    body = "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+    return (
+        "<html><head>"
+        f"<title>{title} | US news | The Guardian</title>"
+        f'<meta property="og:title" content="{title}">'
+        "</head><body><article>"
+        f'<h1>{title}</h1><div class="article-body">{body}</div>'
+        "</article></body></html>"
+    )
+
+
+class StubServer:
+    """A local HTTP server serving canned responses with injected latency"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.routes = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append((time.monotonic(), self.path))
+                time.sleep(stub.latency)
+                route = stub.routes.get(self.path.split("?")[0])
+                if route is None:
+                    status, content_type, body = 404, "text/plain", "not found"
+                else:
+                    status, content_type, body = route(self.path) if callable(route) else route
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def add_page(self, path, body, status=200, content_type="text/html"):
+        """Serve body at path, or call body(path) if it is a callable returning (status, type, body)"""
+        self.routes[path] = body if callable(body) else (status, content_type, body)
+        return self.base_url + path
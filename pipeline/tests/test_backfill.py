@@ -0,0 +1,121 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from stub_server import guardian_html
+from test_ingest import fake_article, fake_preprocess_batch, fake_score_batch
+from pipeline.backfill import Checkpoint, backfill, date_windows
+from pipeline.ingest import ingest_results
+from pipeline.store import (evict, high_water_mark, load_rollups, load_subject, open_store, save_subject,
+                            subject_term_counts)
+
+SUBJECT = {"name": "Harris", "section": "us-news/kamala-harris"}
+
+
+def serve_archive(stub_server, articles):
+    """Serve articles (newest first) honouring from-date and to-date, with two articles per page"""
+    queries = []
+
+    def section(path):
+        query = {key: values[0] for key, values in parse_qs(urlsplit(path).query).items()}
+        queries.append(query)
+        matching = [a for a in articles if query["from-date"] <= a["webPublicationDate"][:10] <= query["to-date"]]
+        page = int(query["page"])
+        body = {"response": {"currentPage": page, "pages": max(1, (len(matching) + 1) // 2),
+                             "results": matching[2 * (page - 1):2 * page]}}
+        return 200, "application/json", json.dumps(body)
+
+    stub_server.add_page("/us-news/kamala-harris", section)
+    return queries
+
+
+def archived(stub_server, day, body=True):
+    url = stub_server.base_url + f"/us-news/2024/oct/{day:02}/article"
+    return {"webUrl": url, "webPublicationDate": f"2024-10-{day:02}T12:00:00Z",
+            "fields": {"headline": f"Article {day}", "bodyText": f"Body of article {day}" if body else ""}}
+
+
+def test_date_windows_cover_the_range_newest_first():
+    assert date_windows("2024-10-01", "2024-10-10", days=4) == [
+        ("2024-10-07", "2024-10-10"), ("2024-10-03", "2024-10-06"), ("2024-10-01", "2024-10-02")]
+    with pytest.raises(ValueError):
+        date_windows("2024-10-10", "2024-10-01")
+
+
+def test_backfill_records_failures_and_resumes_after_a_crash(stub_server, tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    checkpoint_path = str(tmp_path / "backfill.jsonl")
+    articles = [archived(stub_server, day) for day in range(12, 0, -1)]
+    # Two articles come without a body: one page downloads, the other is gone
+    articles[3] = archived(stub_server, 9, body=False)
+    articles[8] = archived(stub_server, 4, body=False)
+    stub_server.add_page("/us-news/2024/oct/09/article", guardian_html("Downloaded", ["Text."]))
+    stub_server.add_page("/us-news/2024/oct/04/article", lambda path: (404, "text/html", "Not found"))
+    queries = serve_archive(stub_server, articles)
+    windows = date_windows("2024-10-01", "2024-10-12", days=3)
+    scored = []
+
+    def crashing_score_batch(texts):
+        # The process dies while the third window is scored
+        if len(scored) == 6:
+            raise KeyboardInterrupt
+        scored.extend(texts)
+        return fake_score_batch(texts)
+
+    def run(score_batch):
+        with Checkpoint(checkpoint_path) as checkpoint:
+            return backfill(store, [SUBJECT], windows, "key", fake_article, score_batch, fake_preprocess_batch,
+                            checkpoint, workers=2, base_url=stub_server.base_url)
+
+    with pytest.raises(KeyboardInterrupt):
+        run(crashing_score_batch)
+    assert len(load_subject(store, "Harris")) == 6
+    assert high_water_mark(store, "Harris")[0] == "2024-10-12T12:00:00Z"
+    # A crash while writing leaves a partial line, which is ignored
+    with open(checkpoint_path, "a") as file:
+        file.write('{"kind": "url", "subj')
+
+    # The resumed run only asks the API for the windows that did not finish
+    queries.clear()
+    summary = run(lambda texts: (scored.extend(texts), fake_score_batch(texts))[1])
+    assert {query["to-date"] for query in queries} == {"2024-10-06", "2024-10-03"}
+    assert summary == {"windows": 2, "skipped": 2, "articles": 5, "failures": 1}
+    assert len(scored) == 11
+
+    # The missing article is recorded instead of aborting the backfill, its window stays open
+    checkpoint = Checkpoint(checkpoint_path)
+    assert [entry["url"] for entry in checkpoint.failures.values()] == [articles[8]["webUrl"]]
+    assert ("Harris", ("2024-10-04", "2024-10-06")) not in checkpoint.windows
+    checkpoint.close()
+    # Every window lands after the newer ones, so the subject still lists its articles newest first
+    assert [record["title"] for record in load_subject(store, "Harris")] == [
+        "Article 12", "Article 11", "Article 10", "Downloaded title", "Article 8", "Article 7", "Article 6",
+        "Article 5", "Article 3", "Article 2", "Article 1"]
+
+    # Resuming again only retries the window of the failed article, without scoring the others again
+    queries.clear()
+    summary = run(fake_score_batch)
+    assert {query["to-date"] for query in queries} == {"2024-10-06"}
+    assert summary == {"windows": 1, "skipped": 3, "articles": 0, "failures": 1}
+
+
+def test_backfilled_articles_stay_listed_and_are_never_evicted(stub_server, tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    serve_archive(stub_server, [archived(stub_server, day) for day in range(12, 0, -1)])
+    with Checkpoint(str(tmp_path / "backfill.jsonl")) as checkpoint:
+        backfill(store, [SUBJECT], date_windows("2024-10-01", "2024-10-12"), "key", fake_article,
+                 fake_score_batch, fake_preprocess_batch, checkpoint, base_url=stub_server.base_url)
+    terms = subject_term_counts(store, "Harris")
+
+    # A full refresh replaces the list of the subject, its backfilled articles stay listed after the new ones
+    records = ingest_results([archived(stub_server, 13)], fake_article, fake_score_batch, fake_preprocess_batch,
+                             store=store)
+    save_subject(store, "Harris", records)
+    assert [record["title"] for record in load_subject(store, "Harris")] == [
+        f"Article {day}" for day in range(13, 0, -1)]
+    assert load_rollups(store, ["Harris"])["count"].sum() == 13
+    assert subject_term_counts(store, "Harris")["article"] == terms["article"] + 1
+
+    assert evict(store, ttl=-1, max_articles=0) == 0
+    assert len(load_subject(store, "Harris")) == 13
@@ -0,0 +1,50 @@
+from pipeline.dedup import minhash, similarity
+from pipeline.ingest import ingest_results
+from pipeline.store import load_scores, open_store, save_subject
+from pipeline.tests.test_store import counting_score_batch, no_download, preprocess_batch
+
+STORY = ("The candidate spoke to thousands of supporters at a rally in Pennsylvania on Saturday, promising to lower "
+         "costs for families, protect voting rights and bring the country together after a bitter campaign that "
+         "has divided voters across the swing states ahead of the November election.")
+
+
+def result(i, body):
+    return {"webUrl": f"https://www.theguardian.com/{i}", "fields": {"headline": f"Title {i}", "bodyText": body}}
+
+
+def test_minhash_estimates_similarity():
+    assert similarity(minhash(STORY), minhash(STORY)) == 1.0
+    assert similarity(minhash(STORY), minhash(STORY + " Updated at 10.15pm.")) > 0.8
+    assert similarity(minhash(STORY), minhash("The vote is on Tuesday in the capital.")) < 0.2
+
+
+def test_near_duplicates_are_scored_once_and_shared(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    calls = []
+    trump = ingest_results([result(1, STORY), result(2, STORY + " Updated at 10.15pm."), result(3, "Other news.")],
+                           no_download, counting_score_batch(calls), preprocess_batch, store=store)
+    harris = ingest_results([result(4, "Updated: " + STORY), result(3, "Other news.")],
+                            no_download, counting_score_batch(calls), preprocess_batch, store=store)
+
+    assert calls == [STORY, "Other news."]
+    assert [record["canonical_url"] for record in trump + harris] == [trump[0]["url"]] * 2 + [trump[2]["url"]] + \
+        [trump[0]["url"], trump[2]["url"]]
+    assert harris[0]["term_counts"] == trump[0]["term_counts"]
+
+    save_subject(store, "Trump", trump)
+    save_subject(store, "Harris", harris)
+    scores = load_scores(store, ["Trump", "Harris"])
+    assert scores["subject"].value_counts().to_dict() == {"Trump": 2, "Harris": 2}
+    assert scores["cross_listed"].all()
+
+
+def test_short_bodies_are_never_duplicates(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    calls = []
+    assert minhash("") is None and minhash("Four words only here") is None
+    records = ingest_results([result(1, "Stub."), result(2, "Stub."), result(3, "Photo.")], no_download,
+                             counting_score_batch(calls), preprocess_batch, store=store)
+
+    assert calls == ["Stub.", "Stub.", "Photo."]
+    assert [record["canonical_url"] for record in records] == [record["url"] for record in records]
+    assert store.execute("SELECT COUNT(*) FROM article_signatures").fetchone()[0] == 0
@@ -0,0 +1,54 @@
+import pytest
+
+from pipeline.export import iter_dataframes, iter_records, open_writer, read_dataframe
+
+
+def scored_record(i):
+    return {"title": f"Title {i}", "url": f"https://www.theguardian.com/{i}", "content": "Body",
+            "published": f"2024-10-{i + 1:02}T12:00:00Z",
+            "polarity": i / 10, "subjectivity": 0.5, "polarity_class": "Neutral", "subjectivity_class": "Objective",
+            "tokens": "vote rally", "term_counts": {"vote": i, "rally": 1}}
+
+
+@pytest.mark.parametrize("name", ["articles.jsonl", "articles.parquet"])
+def test_export_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    with open_writer(path, row_group_size=3) as writer:
+        for i in range(7):
+            writer.write("Harris" if i % 2 else "Trump", scored_record(i))
+
+    records = list(iter_records(path, batch_size=2))
+    assert [record["url"] for record in records] == [scored_record(i)["url"] for i in range(7)]
+    assert records[3] == {"subject": "Harris", **{key: value for key, value in scored_record(3).items()
+                                                   if key not in ("content", "tokens")}}
+
+    chunks = list(iter_dataframes(path, batch_size=3, columns=["subject", "polarity"]))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert list(chunks[0].columns) == ["subject", "polarity"]
+
+    df = read_dataframe(path)
+    assert len(df) == 7
+    assert df.loc[2, "term_counts"] == {"vote": 2, "rally": 1}
+    assert df.groupby("subject").size().to_dict() == {"Harris": 3, "Trump": 4}
+
+
+@pytest.mark.parametrize("name", ["articles.jsonl", "articles.parquet"])
+def test_export_appends(tmp_path, name):
+    path = str(tmp_path / name)
+    for i in range(2):
+        with open_writer(path) as writer:
+            writer.write("Trump", scored_record(i))
+    assert [record["title"] for record in iter_records(path)] == ["Title 0", "Title 1"]
+
+
+def test_parquet_export_is_readable_while_open(tmp_path):
+    path = str(tmp_path / "articles.parquet")
+    writer = open_writer(path)
+    writer.write("Trump", scored_record(0))
+    writer.flush()
+    writer.write("Trump", scored_record(1))
+
+    # Flushed parts can be read before the writer is closed, unflushed records are not written yet
+    assert len(read_dataframe(path)) == 1
+    writer.close()
+    assert len(read_dataframe(path, columns=["polarity"])) == 2
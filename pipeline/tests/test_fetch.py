@@ -0,0 +1,65 @@
+import time
+
+from newspaper import Article
+
+from stub_server import guardian_html
+from pipeline.fetch import fetch_all
+from pipeline.http import HostRateLimiter
+
+
+def parse_page(url, html):
+    page = Article(url)
+    page.download(input_html=html)
+    page.parse()
+    return {"url": url, "title": page.title, "content": page.text}
+
+
+def add_articles(stub_server, count):
+    urls = []
+    for i in range(count):
+        title = f"Campaign update number {i}"
+        paragraphs = [f"Article {i} reports on the campaign trail in several swing states this week."] * 5
+        urls.append(stub_server.add_page(f"/us-news/2024/article-{i}", guardian_html(title, paragraphs)))
+    return urls
+
+
+def test_fetch_all_keeps_order(stub_server):
+    urls = add_articles(stub_server, 6)
+    records = fetch_all(urls, parse_page, min_interval=0)
+    assert [record["url"] for record in records] == urls
+    assert [record["title"] for record in records] == [f"Campaign update number {i}" for i in range(6)]
+    assert all("swing states" in record["content"] for record in records)
+
+
+def test_fetch_all_overlaps_latency(stub_server):
+    stub_server.latency = 0.2
+    urls = add_articles(stub_server, 10)
+    start = time.monotonic()
+    fetch_all(urls, parse_page, max_workers=10, min_interval=0)
+    elapsed = time.monotonic() - start
+    # Serially this takes at least 10 * 0.2 seconds
+    assert elapsed < 1.0
+
+
+def test_fetch_all_retries_transient_errors(stub_server):
+    attempts = []
+
+    def flaky(path):
+        attempts.append(path)
+        if len(attempts) < 3:
+            return 503, "text/plain", "unavailable"
+        return 200, "text/html", guardian_html("Recovered", ["The page loaded after two failures."] * 3)
+
+    url = stub_server.add_page("/us-news/flaky", flaky)
+    records = fetch_all([url], parse_page, backoff=0.01)
+    assert len(attempts) == 3
+    assert records[0]["title"] == "Recovered"
+
+
+def test_host_rate_limiter_spaces_requests():
+    limiter = HostRateLimiter(min_interval=0.05)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.wait("https://www.theguardian.com/a")
+    # The first call goes through immediately, the next three wait one interval each
+    assert time.monotonic() - start >= 0.15
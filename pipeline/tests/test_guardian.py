@@ -0,0 +1,54 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from pipeline.guardian import fetch_articles, iter_results
+
+
+def serve_section(stub_server, total, page_size):
+    """Serve a paginated Guardian section with total articles and record the query of every call"""
+    queries = []
+    pages = -(-total // page_size)
+
+    def section(path):
+        query = {key: values[0] for key, values in parse_qs(urlsplit(path).query).items()}
+        queries.append(query)
+        page = int(query["page"])
+        start = (page - 1) * page_size
+        results = [{"id": f"us-news/article-{i}", "webUrl": f"https://www.theguardian.com/us-news/article-{i}"}
+                   for i in range(start, min(start + page_size, total))]
+        body = {"response": {"status": "ok", "currentPage": page, "pages": pages, "results": results}}
+        return 200, "application/json", json.dumps(body)
+
+    stub_server.add_page("/us-news/kamala-harris", section)
+    return queries
+
+
+def test_iter_results_walks_every_page(stub_server):
+    queries = serve_section(stub_server, total=23, page_size=10)
+    results = list(iter_results("key", "us-news/kamala-harris", page_size=10, base_url=stub_server.base_url))
+    assert [result["id"] for result in results] == [f"us-news/article-{i}" for i in range(23)]
+    assert [query["page"] for query in queries] == ["1", "2", "3"]
+    assert queries[0]["page-size"] == "10"
+
+
+def test_iter_results_stops_at_limit_without_extra_pages(stub_server):
+    queries = serve_section(stub_server, total=100, page_size=10)
+    results = list(iter_results("key", "us-news/kamala-harris", page_size=10, limit=15,
+                                base_url=stub_server.base_url))
+    assert len(results) == 15
+    assert len(queries) == 2
+
+
+def test_iter_results_passes_date_window(stub_server):
+    queries = serve_section(stub_server, total=5, page_size=10)
+    list(iter_results("key", "us-news/kamala-harris", from_date="2024-07-21", to_date="2024-11-05",
+                      order_by="oldest", base_url=stub_server.base_url))
+    assert queries[0]["from-date"] == "2024-07-21"
+    assert queries[0]["to-date"] == "2024-11-05"
+    assert queries[0]["order-by"] == "oldest"
+
+
+def test_fetch_articles_returns_urls(stub_server):
+    serve_section(stub_server, total=50, page_size=50)
+    urls = fetch_articles("key", "us-news/kamala-harris", base_url=stub_server.base_url)
+    assert urls == [f"https://www.theguardian.com/us-news/article-{i}" for i in range(20)]
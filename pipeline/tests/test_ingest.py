@@ -0,0 +1,118 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from stub_server import guardian_html
+from pipeline.ingest import ingest_results, ingest_subject, paragraph_text
+from pipeline.store import high_water_mark, load_subject, open_store
+
+
+def fake_score_batch(texts):
+    return pd.DataFrame({"polarity": [0.2] * len(texts), "subjectivity": [0.4] * len(texts),
+                         "polarity_class": ["Slightly positive"] * len(texts),
+                         "subjectivity_class": ["Moderately subjective"] * len(texts)})
+
+
+def fake_preprocess_batch(texts):
+    return [text.lower() for text in texts]
+
+
+def fake_article(url, html):
+    return "Downloaded text", "Downloaded title"
+
+
+def test_api_mode_uses_payload_and_downloads_only_missing_bodies(stub_server):
+    missing_url = stub_server.add_page("/us-news/no-body", guardian_html("Downloaded", ["Some text."]))
+    results = [
+        {"webUrl": "https://www.theguardian.com/a", "fields": {"headline": "First", "bodyText": "First body"}},
+        {"webUrl": missing_url, "webTitle": "No body", "fields": {"headline": "No body"}},
+        {"webUrl": "https://www.theguardian.com/c", "webTitle": "Third", "fields": {"bodyText": "Third body"}},
+    ]
+    records = ingest_results(results, fake_article, fake_score_batch, fake_preprocess_batch)
+
+    assert [record["url"] for record in records] == [result["webUrl"] for result in results]
+    assert [record["title"] for record in records] == ["First", "Downloaded title", "Third"]
+    assert records[0]["content"] == "First body"
+    assert records[1]["content"] == "Downloaded text"
+    assert records[2]["polarity_class"] == "Slightly positive"
+    assert records[0]["tokens"] == "first body"
+    assert records[0]["term_counts"] == {"first": 1, "body": 1}
+    assert len(stub_server.requests) == 1
+
+
+def test_body_html_keeps_the_paragraphs_of_the_text():
+    body = ('<p>Harris spoke in <a href="/x">Philadelphia</a>.</p> <figure><figcaption>Photo</figcaption></figure>'
+            '<p class="quote">&ldquo;We will win,&rdquo; she said.</p><p> </p>')
+    assert paragraph_text(body) == "Harris spoke in Philadelphia.\n\n\u201cWe will win,\u201d she said."
+
+    # bodyText runs the paragraphs together, the body field is used when it was requested
+    results = [{"webUrl": "https://www.theguardian.com/a",
+                "fields": {"headline": "A", "bodyText": "One.Two.", "body": "<p>One.</p><p>Two.</p>"}}]
+    records = ingest_results(results, fake_article, fake_score_batch, fake_preprocess_batch)
+    assert records[0]["content"] == "One.\n\nTwo."
+
+
+def test_html_mode_downloads_every_page(stub_server):
+    urls = [stub_server.add_page(f"/us-news/{i}", guardian_html("Page", ["Text."])) for i in range(3)]
+    results = [{"webUrl": url, "fields": {"bodyText": "API body"}} for url in urls]
+    records = ingest_results(results, fake_article, fake_score_batch, fake_preprocess_batch, mode="html")
+
+    assert [record["content"] for record in records] == ["Downloaded text"] * 3
+    assert len(stub_server.requests) == 3
+
+
+def serve_newest_first(stub_server, articles):
+    """Serve articles (newest first) honouring from-date, with one article per page"""
+    queries = []
+
+    def section(path):
+        query = {key: values[0] for key, values in parse_qs(urlsplit(path).query).items()}
+        queries.append(query)
+        matching = [a for a in articles if a["webPublicationDate"][:10] >= query.get("from-date", "")]
+        page = int(query["page"])
+        body = {"response": {"currentPage": page, "pages": len(matching), "results": matching[page - 1:page]}}
+        return 200, "application/json", json.dumps(body)
+
+    stub_server.add_page("/us-news/kamala-harris", section)
+    return queries
+
+
+def guardian_result(day, hour):
+    return {"webUrl": f"https://www.theguardian.com/{day}-{hour}",
+            "webPublicationDate": f"2024-10-{day:02}T{hour:02}:00:00Z",
+            "fields": {"headline": f"Article {day} {hour}", "bodyText": f"Body {day} {hour}"}}
+
+
+def test_incremental_ingest_only_processes_new_articles(stub_server, tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    articles = [guardian_result(3, 9), guardian_result(2, 18), guardian_result(2, 8), guardian_result(1, 12)]
+    queries = serve_newest_first(stub_server, articles)
+    scored = []
+
+    def score_batch(texts):
+        scored.extend(texts)
+        return fake_score_batch(texts)
+
+    def ingest():
+        subject = {"name": "Harris", "section": "us-news/kamala-harris"}
+        return ingest_subject(store, subject, "key", fake_article, score_batch, fake_preprocess_batch,
+                              limit=3, base_url=stub_server.base_url)
+
+    assert [record["title"] for record in ingest()] == ["Article 3 9", "Article 2 18", "Article 2 8"]
+    assert high_water_mark(store, "Harris") == ("2024-10-03T09:00:00Z", "https://www.theguardian.com/3-9")
+
+    # Nothing new: a single request, nothing scored
+    queries.clear()
+    assert ingest() == []
+    assert len(queries) == 1 and queries[0]["from-date"] == "2024-10-03"
+    assert len(scored) == 3
+
+    # Two new articles: only they are scored, paging stops at the known one
+    articles[:0] = [guardian_result(4, 10), guardian_result(3, 20)]
+    queries.clear()
+    assert [record["title"] for record in ingest()] == ["Article 4 10", "Article 3 20"]
+    assert len(queries) == 3
+    assert len(scored) == 5
+    assert [record["title"] for record in load_subject(store, "Harris")] == [
+        "Article 4 10", "Article 3 20", "Article 3 9", "Article 2 18", "Article 2 8"]
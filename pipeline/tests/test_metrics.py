@@ -0,0 +1,71 @@
+import json
+
+from stub_server import guardian_html
+from pipeline.fetch import fetch_all
+from pipeline.ingest import ingest_results
+from pipeline.metrics import RunMetrics, to_prometheus, write_jsonl
+from pipeline.store import latest_run, open_store, save_run
+from test_ingest import fake_preprocess_batch, fake_score_batch
+
+
+def same_article(url, html):
+    return "Every page of this test parses to the very same long article text", "Title"
+
+
+def test_run_metrics_collects_stage_timings_and_counters(stub_server):
+    attempts = []
+
+    def flaky(path):
+        attempts.append(path)
+        if len(attempts) < 2:
+            return 503, "text/plain", "unavailable"
+        return 200, "text/html", guardian_html("Recovered", ["Some text."])
+
+    flaky_url = stub_server.add_page("/us-news/flaky", flaky)
+    urls = [stub_server.add_page(f"/us-news/{i}", guardian_html("Page", ["Text."])) for i in range(2)]
+    results = [{"webUrl": url, "fields": {}} for url in [*urls, flaky_url]]
+
+    with RunMetrics() as run:
+        ingest_results(results, same_article, fake_score_batch, fake_preprocess_batch,
+                       store=open_store(":memory:"))
+    summary = run.summary()
+
+    assert summary["stages"]["download"]["calls"] == 3
+    # Every page has the same body, so only the first one is scored
+    assert summary["stages"]["dedup"]["items"] == 3
+    assert summary["stages"]["score"]["items"] == 1
+    assert summary["counters"]["duplicates"] == 2
+    assert {"preprocess", "save"} <= set(summary["stages"])
+    assert sorted(event["url"] for event in run.events) == sorted([*urls, flaky_url])
+    assert summary["counters"]['http_responses{stage="download",status="200"}'] == 3
+    assert summary["counters"]['http_responses{stage="download",status="503"}'] == 1
+    assert summary["counters"]['http_retries{stage="download"}'] == 1
+    assert summary["counters"]['bytes_fetched{stage="download"}'] > 0
+
+    # Nothing is collected once the run is over
+    fetch_all(urls, lambda url, html: html)
+    assert summary["stages"]["download"]["calls"] == 3
+
+
+def test_run_exports(tmp_path):
+    with RunMetrics() as run:
+        run({"kind": "stage", "name": "download", "value": 0.5, "url": "https://example.com/a"})
+        run({"kind": "stage", "name": "score", "value": 1.5, "items": 10})
+        run({"kind": "counter", "name": "cache_hits", "value": 2})
+    summary = run.summary()
+
+    text = to_prometheus(summary)
+    assert 'pipeline_stage_seconds_total{stage="score"} 1.5' in text
+    assert 'pipeline_stage_items_total{stage="score"} 10' in text
+    assert "# TYPE pipeline_cache_hits_total counter\npipeline_cache_hits_total 2" in text
+
+    path = tmp_path / "metrics.jsonl"
+    write_jsonl(run, str(path))
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["kind"] for line in lines] == ["stage", "run"]
+    assert lines[0]["url"] == "https://example.com/a"
+
+    store = open_store(":memory:")
+    assert latest_run(store) is None
+    save_run(store, summary)
+    assert latest_run(store)["stages"]["score"] == {"seconds": 1.5, "calls": 1, "items": 10}
@@ -0,0 +1,109 @@
+import zipfile
+
+import nltk
+import numpy as np
+import pytest
+
+from pipeline import nlp, resources
+from pipeline.nlp import (calculate_sentiment, classify_polarity, classify_subjectivity, granular_sentiment, iter_chunks,
+                          score_batch, score_text, sentiment_analysis)
+from pipeline.store import open_store
+
+
+def test_vectorized_classes_match_calculate_sentiment():
+    # A fine grid plus every class boundary, where the comparison operators matter
+    bounds = [-0.75, -0.5, -0.3, -0.1, 0.1, 0.3, 0.5, 0.75]
+    values = np.unique(np.concatenate([np.round(np.linspace(-1, 1, 2001), 4), bounds]))
+
+    assert list(classify_polarity(values)) == [calculate_sentiment(v, "polarity") for v in values]
+    positive = values[values >= 0]
+    assert list(classify_subjectivity(positive)) == [calculate_sentiment(v, "subjectivity") for v in positive]
+
+
+def test_score_batch_matches_sentiment_analysis():
+    texts = ["What a wonderful, inspiring speech.", "The plan was a terrible failure.",
+             "The vote is on Tuesday."] * 30
+    df = score_batch(texts, workers=2, chunksize=8)
+
+    assert len(df) == len(texts)
+    for row, text in zip(df.itertuples(index=False), texts):
+        assert (row.polarity, row.subjectivity, row.polarity_class, row.subjectivity_class) == sentiment_analysis(text)
+    assert df.attrs["articles_per_sec"] > 0
+
+
+def test_score_batch_empty():
+    assert score_batch([]).empty
+
+
+def test_granular_sentiment_aggregates_paragraphs():
+    paragraphs = ["What a wonderful, inspiring speech.", "The plan was a terrible failure.",
+                  "The vote is on Tuesday."] * 5
+    text = "\n\n".join(paragraphs)
+    polarities = np.array([score_text(paragraph)[0] for paragraph in paragraphs])
+
+    result = granular_sentiment(text, unit="paragraph", batch_size=4)
+    assert list(iter_chunks(text, unit="paragraph")) == paragraphs
+    assert result["chunks"] == 15
+    assert result["negative_share"] == pytest.approx(1 / 3)
+    assert result["polarity"] == pytest.approx(polarities.mean())
+    assert result["polarity_var"] == pytest.approx(polarities.var(ddof=1))
+    assert (result["polarity_min"], result["polarity_max"]) == (polarities.min(), polarities.max())
+
+
+def test_score_batch_granular_columns():
+    df = score_batch(["Great news.\nAwful news.", ""], workers=1, unit="paragraph")
+    assert list(df["chunks"]) == [2, 0]
+    assert list(df["negative_share"]) == [0.5, 0.0]
+    with pytest.raises(ValueError):
+        score_batch(["text"], unit="word")
+
+
+def test_score_batch_caches_scores_per_backend(monkeypatch):
+    store = open_store(":memory:")
+    texts = ["What a wonderful, inspiring speech.", "The plan was a terrible failure."]
+    first = score_batch(texts, store=store)
+
+    # Cached scores are served without calling the scorer again
+    monkeypatch.setitem(nlp._SCORERS, "textblob", lambda texts: pytest.fail("scored again"))
+    second = score_batch(texts[::-1], store=store)
+    assert second.attrs["cache_hits"] == 2
+    assert list(second["polarity"]) == list(first["polarity"][::-1])
+
+    with pytest.raises(ValueError, match="backend"):
+        score_batch(texts, backend="pattern")
+
+
+def test_sentences_are_found_without_paragraph_breaks(tmp_path, monkeypatch):
+    # Empty punkt parameters in the layout of NLTK's punkt_tab package still split on sentence ends
+    english = tmp_path / "tokenizers" / "punkt_tab" / "english"
+    english.mkdir(parents=True)
+    for name in ("collocations.tab", "sent_starters.txt", "abbrev_types.txt", "ortho_context.tab"):
+        (english / name).touch()
+    monkeypatch.setattr(nltk.data, "path", [str(tmp_path)])
+    monkeypatch.setattr(resources, "_installed", set())
+    nlp._sentence_tokenizer.cache_clear()
+    try:
+        # Like the bodyText of the Guardian API, one line for the whole article
+        chunks = iter_chunks("What a wonderful speech. The plan was a terrible failure. The vote is on Tuesday.")
+        assert next(chunks) == "What a wonderful speech."
+        assert list(chunks) == ["The plan was a terrible failure.", "The vote is on Tuesday."]
+    finally:
+        nlp._sentence_tokenizer.cache_clear()
+
+
+def test_vader_backend(tmp_path, monkeypatch):
+    # A two-word lexicon in the layout of NLTK's vader_lexicon package
+    (tmp_path / "sentiment").mkdir()
+    with zipfile.ZipFile(tmp_path / "sentiment" / "vader_lexicon.zip", "w") as lexicon:
+        lexicon.writestr("vader_lexicon/vader_lexicon.txt", "wonderful\t2.7\t0.5\t[3, 3]\nterrible\t-2.5\t0.5\t[-3, -2]")
+    monkeypatch.setattr(nltk.data, "path", [str(tmp_path)])
+    monkeypatch.setattr(resources, "_installed", set())
+    nlp._vader_analyzer.cache_clear()
+    try:
+        df = score_batch(["What a wonderful speech", "A terrible plan", "The vote is on Tuesday"], backend="vader")
+    finally:
+        nlp._vader_analyzer.cache_clear()
+
+    assert list(df["polarity"] > 0) == [True, False, False]
+    assert list(df["polarity_class"][1:]) == ["Significantly negative", "Neutral"]
+    assert df["subjectivity"].iloc[2] == 0.0
@@ -0,0 +1,41 @@
+import zipfile
+
+import nltk
+import pytest
+
+from pipeline import resources
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # Only the temporary directory is searched, whatever is installed on the machine
+    monkeypatch.setattr(nltk.data, "path", [])
+    monkeypatch.setattr(resources, "_installed", set())
+    return tmp_path
+
+
+def test_setup_downloads_only_missing_packages(data_dir, monkeypatch):
+    (data_dir / "corpora" / "stopwords").mkdir(parents=True)
+    downloads = []
+
+    def download(name, download_dir, quiet):
+        downloads.append(name)
+        path = data_dir / resources.NLTK_RESOURCES[name]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Packages are unzipped into a directory, except the ones NLTK reads from their zip file
+        if path.suffix == ".zip":
+            zipfile.ZipFile(path, "w").close()
+        else:
+            path.mkdir()
+        return True
+
+    monkeypatch.setattr(nltk, "download", download)
+    assert resources.setup(str(data_dir)) == ["wordnet", "punkt_tab", "vader_lexicon"]
+    assert resources.setup(str(data_dir)) == []
+    assert downloads == ["wordnet", "punkt_tab", "vader_lexicon"]
+
+
+def test_require_names_the_setup_command(data_dir):
+    resources.use_local_data(str(data_dir))
+    with pytest.raises(LookupError, match="refresh.py --setup"):
+        resources.require("wordnet")
@@ -0,0 +1,56 @@
+from pipeline.search import count_matches, facet_counts, match_expression, search_articles
+from pipeline.store import evict, open_store, save_records, save_subject
+
+
+def record(i, title, tokens, polarity_class="Neutral"):
+    return {"url": f"https://www.theguardian.com/{i}", "title": title, "content": f"Body {i}",
+            "published": f"2024-10-{i + 1:02d}", "polarity": 0.0, "subjectivity": 0.0,
+            "polarity_class": polarity_class, "subjectivity_class": "Objective", "tokens": tokens,
+            "term_counts": {}}
+
+
+def test_index_follows_saved_and_evicted_articles(tmp_path):
+    path = str(tmp_path / "articles.db")
+    store = open_store(path)
+    save_records(store, [record(0, "Ohio rally", "rally crowd"), record(1, "Court ruling", "judge ruling")])
+    assert search_articles(store, "rallies")["title"].tolist() == ["Ohio rally"]
+
+    # A changed article is indexed again, its old words no longer match
+    save_records(store, [record(0, "Ohio debate", "debate stage")])
+    assert count_matches(store, "rally") == 0
+    assert count_matches(store, "debate") == 1
+
+    # Stores created before the index are indexed when opened
+    store.execute("DROP TABLE article_search")
+    store.commit()
+    store = open_store(path)
+    assert count_matches(store, "judge") == 1
+
+    evict(store, ttl=-1)
+    assert count_matches(store, "judge") == 0
+    store.execute("INSERT INTO article_search (article_search) VALUES ('integrity-check')")
+
+
+def test_search_filters_facets_and_pages():
+    store = open_store(":memory:")
+    records = [record(i, f"Election story {i}", "election voter", "Neutral" if i % 3 else "Slightly positive")
+               for i in range(25)]
+    save_records(store, records)
+    save_subject(store, "Trump", records[:10])
+    save_subject(store, "Harris", records[5:])
+
+    assert count_matches(store, "elections") == 25
+    assert count_matches(store, "election", subjects=["Trump"], polarity_classes=["Slightly positive"]) == 4
+    assert facet_counts(store, "election", ["Trump"])["polarity_class"] == {"Neutral": 6, "Slightly positive": 4}
+
+    # Without words, the newest articles come first
+    first, last = search_articles(store, page_size=10), search_articles(store, page=3, page_size=10)
+    assert first["title"].iloc[0] == "Election story 24"
+    assert len(last) == 5
+    assert search_articles(store, subjects=["Harris"], page_size=30)["subjects"].value_counts().to_dict() == \
+        {"Harris": 15, "Trump, Harris": 5}
+
+    # Operators and punctuation are searched for literally instead of breaking the query
+    assert match_expression('NOT "ohio" AND') == '"NOT" "ohio" "AND"'
+    assert match_expression(" ?! ") is None
+    assert count_matches(store, 'voter) OR (') == 0
@@ -0,0 +1,185 @@
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from pipeline.ingest import ingest_results
+from pipeline.store import (cached_record, evict, last_refreshed, load_article_columns, load_body, load_rollups,
+                            load_scores, load_subject, open_reader, open_store, save_records, save_subject,
+                            subject_is_fresh, subject_term_counts)
+
+
+def counting_score_batch(calls):
+    def score_batch(texts):
+        calls.extend(texts)
+        return pd.DataFrame({"polarity": [0.0] * len(texts), "subjectivity": [0.0] * len(texts),
+                             "polarity_class": ["Neutral"] * len(texts), "subjectivity_class": ["Objective"] * len(texts)})
+    return score_batch
+
+
+def preprocess_batch(texts):
+    return [text.lower() for text in texts]
+
+
+def no_download(url, html):
+    raise AssertionError(f"{url} should not be downloaded")
+
+
+def api_result(i, body=None):
+    return {"webUrl": f"https://www.theguardian.com/{i}", "fields": {"headline": f"Title {i}", "bodyText": body or f"Body {i}"}}
+
+
+def test_warm_ingest_skips_scoring(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    calls = []
+    results = [api_result(i) for i in range(3)]
+
+    first = ingest_results(results, no_download, counting_score_batch(calls), preprocess_batch, store=store)
+    second = ingest_results(results, no_download, counting_score_batch(calls), preprocess_batch, store=store)
+
+    assert len(calls) == 3
+    assert second == first
+
+
+def test_changed_body_is_scored_again(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    calls = []
+    ingest_results([api_result(1)], no_download, counting_score_batch(calls), preprocess_batch, store=store)
+    ingest_results([api_result(1, body="Updated body")], no_download, counting_score_batch(calls), preprocess_batch,
+                   store=store)
+
+    assert calls == ["Body 1", "Updated body"]
+    assert cached_record(store, "https://www.theguardian.com/1", "Body 1") is None
+    assert cached_record(store, "https://www.theguardian.com/1")["content"] == "Updated body"
+
+
+def test_subject_round_trip_and_freshness(tmp_path):
+    path = str(tmp_path / "articles.db")
+    store = open_store(path)
+    records = ingest_results([api_result(i) for i in range(3)], no_download, counting_score_batch([]),
+                             preprocess_batch, store=store)
+    save_subject(store, "Harris", records[::-1])
+
+    reopened = open_store(path)
+    assert load_subject(reopened, "Harris") == records[::-1]
+    assert load_subject(reopened, "Harris")[0]["term_counts"] == {"body": 1, "2": 1}
+    assert subject_is_fresh(reopened, "Harris", ttl=60)
+    assert not subject_is_fresh(reopened, "Harris", ttl=0)
+    assert not subject_is_fresh(reopened, "Trump", ttl=60)
+
+
+def test_reader_is_not_blocked_by_a_refresh(tmp_path):
+    path = str(tmp_path / "articles.db")
+    assert open_reader(path) is None
+    assert not (tmp_path / "articles.db").exists()
+
+    store = open_store(path)
+    records = ingest_results([api_result(i) for i in range(2)], no_download, counting_score_batch([]),
+                             preprocess_batch, store=store)
+    save_subject(store, "Harris", records)
+
+    # A refresh in the middle of a write transaction
+    store.execute("DELETE FROM subject_articles")
+    reader = open_reader(path)
+    assert len(load_article_columns(reader, "Harris")) == 2
+    assert last_refreshed(reader) is not None
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("DELETE FROM articles")
+    store.rollback()
+
+
+def test_evict_keeps_subject_articles_and_ages_out_unlisted_ones(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    records = ingest_results([api_result(i) for i in range(6)], no_download, counting_score_batch([]),
+                             preprocess_batch, store=store)
+    save_subject(store, "Harris", records[:2])
+    now = time.time()
+    for i in range(6):
+        store.execute("UPDATE articles SET fetched_at = ? WHERE url = ?", (now - i * 100, records[i]["url"]))
+
+    # The history of a subject is kept however old it is, only articles no subject lists are evicted
+    assert evict(store, ttl=-1, max_articles=0) == 4
+    assert evict(store, ttl=-1, max_articles=0) == 0
+    assert [record["url"] for record in load_subject(store, "Harris")] == [records[0]["url"], records[1]["url"]]
+
+    # Unlisted articles go by age, then the ones fetched longest ago above max_articles
+    save_subject(store, "Harris", records[:1])
+    save_records(store, records[2:])
+    for i in range(1, 6):
+        store.execute("UPDATE articles SET fetched_at = ? WHERE url = ?", (now - i * 100, records[i]["url"]))
+    assert evict(store, ttl=450, max_articles=10) == 1
+    assert evict(store, ttl=450, max_articles=2) == 2
+    assert cached_record(store, records[1]["url"]) is not None
+    assert cached_record(store, records[0]["url"]) is not None
+
+
+def test_subject_term_counts_follow_links(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    results = [api_result(i, body=f"vote {'rally ' * i}") for i in range(1, 4)]
+    records = ingest_results(results, no_download, counting_score_batch([]), preprocess_batch, store=store)
+
+    save_subject(store, "Harris", records[:2])
+    save_subject(store, "Harris", records[2:], append=True)
+    save_subject(store, "Harris", records[2:], append=True)
+    assert subject_term_counts(store, "Harris") == {"rally": 6, "vote": 3}
+    assert subject_term_counts(store, "Harris", limit=1) == {"rally": 6}
+
+    evict(store, ttl=-1)
+    assert subject_term_counts(store, "Harris") == {"rally": 6, "vote": 3}
+
+    save_subject(store, "Harris", records[:1])
+    assert subject_term_counts(store, "Harris") == {"vote": 1, "rally": 1}
+
+
+def test_load_scores_are_columnar(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    records = ingest_results([api_result(i) for i in range(3)], no_download, counting_score_batch([]),
+                             preprocess_batch, store=store)
+    save_subject(store, "Harris", records[:2])
+    save_subject(store, "Trump", records[1:])
+
+    scores = load_scores(store, ["Trump", "Harris"])
+    assert list(scores.columns) == ["subject", "polarity", "subjectivity", "cross_listed"]
+    assert list(scores["subject"].cat.categories) == ["Trump", "Harris"]
+    assert scores["subject"].value_counts().to_dict() == {"Trump": 2, "Harris": 2}
+    assert scores["cross_listed"].sum() == 2
+
+
+def test_article_columns_are_compact_and_leave_bodies_out(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    records = ingest_results([api_result(i) for i in range(3)], no_download, counting_score_batch([]),
+                             preprocess_batch, store=store)
+    save_subject(store, "Harris", records[::-1])
+
+    columns = load_article_columns(store, "Harris")
+    assert columns["title"].tolist() == ["Title 2", "Title 1", "Title 0"]
+    assert "content" not in columns
+    assert columns["polarity"].dtype == "float32"
+    assert list(columns["polarity_class"].cat.categories) == ["Neutral"]
+    assert load_body(store, columns["url"].iloc[0]) == "Body 2"
+    assert load_body(store, "https://www.theguardian.com/missing") is None
+
+
+def test_rollups_update_incrementally(tmp_path):
+    store = open_store(str(tmp_path / "articles.db"))
+    days = ["2024-10-07", "2024-10-07", "2024-10-08", "2024-10-15"]
+    results = [{**api_result(i), "webPublicationDate": f"{day}T12:00:00Z"} for i, day in enumerate(days)]
+    records = ingest_results(results, no_download, counting_score_batch([]), preprocess_batch, store=store)
+    for record, polarity in zip(records, [0.1, 0.3, -0.2, 0.5]):
+        record["polarity"] = polarity
+    save_records(store, records)
+
+    save_subject(store, "Harris", records[:1])
+    save_subject(store, "Harris", records[1:], append=True)
+    weekly = load_rollups(store, ["Harris"], period="week").set_index("bucket")
+    assert weekly["count"].tolist() == [3, 1]
+    assert weekly.loc["2024-10-07", "polarity_mean"] == pytest.approx(pd.Series([0.1, 0.3, -0.2]).mean())
+    assert weekly.loc["2024-10-07", "polarity_var"] == pytest.approx(pd.Series([0.1, 0.3, -0.2]).var())
+    assert weekly.loc["2024-10-07", "Neutral"] == 3
+
+    # Linked articles are never evicted, so the rollups keep the whole history
+    evict(store, ttl=-1)
+    daily = load_rollups(store, ["Harris"]).set_index("bucket")
+    assert daily["count"].tolist() == [2, 1, 1]
+    assert daily.loc["2024-10-07", "polarity_var"] == pytest.approx(0.02)
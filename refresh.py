@@ -0,0 +1,186 @@
+import argparse
+import os
+from functools import partial
+import time
+import traceback
+
+from analysis.preprocessing import preprocess_many
+from pipeline.backfill import Checkpoint, backfill, date_windows
+from pipeline.export import open_writer
+from pipeline.http import make_session
+from pipeline.ingest import ingest_subject
+from pipeline.metrics import RunMetrics, timed, write_jsonl, write_prometheus
+from pipeline.nlp import article, score_batch
+from pipeline.resources import setup
+from pipeline.store import STORE_PATH, evict, open_store, save_run, subject_is_fresh
+from pipeline.subjects import SUBJECTS_FILE, load_subjects
+
+# Number of articles analyzed on the first run of a subject, later runs add every new article
+ARTICLE_LIMIT = int(os.getenv("ARTICLE_LIMIT", 20))
+
+# "api" reads the article text from the API payload, "html" downloads and parses every page
+INGEST_MODE = os.getenv("INGEST_MODE", "api")
+
+# "document" scores each article as a whole, "paragraph" or "sentence" also record how the sentiment varies within it
+SENTIMENT_UNIT = os.getenv("SENTIMENT_UNIT", "document")
+
+# "textblob" (the reference scores) or "vader", a faster lexicon scorer for bulk runs
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "textblob")
+
+# Default log of --backfill runs, read back to resume an interrupted backfill
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "data/backfill.jsonl")
+
+
+def get_api_key():
+    """Read the Guardian API key from the API_KEY environment variable"""
+    api_key = os.getenv("API_KEY")
+    if not api_key:
+        raise ValueError("Error: API key not found. Please set the 'API_KEY' environment variable.")
+    return api_key
+
+
+def save_metrics(store, run, metrics_path=None):
+    """Save the summary of a run for the pipeline health page, and write it to metrics_path when given"""
+    save_run(store, run.summary())
+    if metrics_path is not None:
+        if metrics_path.endswith(".prom"):
+            write_prometheus(run, metrics_path)
+        else:
+            write_jsonl(run, metrics_path)
+
+
+def refresh(store, subjects, force=False, incremental=True, writer=None, metrics_path=None):
+    """
+    Scrape, score and store the new articles of every subject, then evict the articles no subject lists any more
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subjects (list): The subject configs to refresh
+    - force (bool): Query the API even for subjects refreshed less than CACHE_TTL seconds ago
+    - incremental (bool): Only process articles published since the last run of each subject
+    - writer (JsonlWriter or ParquetWriter): Optional export the new articles are streamed to
+    - metrics_path (str): Optional file the stage timings and counters of the run are written to, as Prometheus
+      text for .prom files or appended JSON lines otherwise
+    Returns:
+    - None
+    """
+    # Recently refreshed subjects are skipped without any network calls or NLP work
+    stale = [subject for subject in subjects if force or not subject_is_fresh(store, subject["name"])]
+    if not stale:
+        return
+
+    api_key = get_api_key()
+
+    # All subjects share one pooled session, one store and the same NLP models
+    session = make_session()
+    with RunMetrics() as run:
+        for subject in stale:
+            new_articles = ingest_subject(store, subject, api_key, article,
+                                          partial(score_batch, unit=SENTIMENT_UNIT, backend=SENTIMENT_BACKEND,
+                                                  store=store), preprocess_many,
+                                          limit=ARTICLE_LIMIT, mode=INGEST_MODE, incremental=incremental,
+                                          session=session, paragraphs=SENTIMENT_UNIT != "document")
+            print(f"{subject['name']}: retrieved {len(new_articles)} new articles")
+            if writer is not None:
+                for record in new_articles:
+                    writer.write(subject["name"], record)
+                writer.flush()
+        with timed("evict"):
+            evict(store)
+
+    # The latest run is shown on the pipeline health page of the dashboard
+    save_metrics(store, run, metrics_path)
+
+
+def run_backfill(store, subjects, start, end, window_days=7, workers=4, checkpoint_path=CHECKPOINT_PATH,
+                 metrics_path=None):
+    """
+    Store every article of the subjects published between two dates, resuming from the checkpoint if any
+    Parameters:
+    - store (sqlite3.Connection): The article store
+    - subjects (list): The subject configs to backfill
+    - start (str): The first day to backfill (YYYY-MM-DD)
+    - end (str): The last day to backfill (YYYY-MM-DD)
+    - window_days (int): The number of days fetched as one unit of work
+    - workers (int): The number of windows fetched from the API at the same time
+    - checkpoint_path (str): The log of the finished windows, stored URLs and failures
+    - metrics_path (str): Optional file the stage timings and counters are written to, see refresh
+    Returns:
+    - dict: The counts of the backfill, see backfill
+    """
+    api_key = get_api_key()
+    windows = date_windows(start, end, window_days)
+    session = make_session(max(10, workers))
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    with Checkpoint(checkpoint_path) as checkpoint, RunMetrics() as run:
+        summary = backfill(store, subjects, windows, api_key, article,
+                           partial(score_batch, unit=SENTIMENT_UNIT, backend=SENTIMENT_BACKEND, store=store),
+                           preprocess_many, checkpoint, workers=workers, mode=INGEST_MODE, session=session,
+                           paragraphs=SENTIMENT_UNIT != "document")
+        outstanding = len(checkpoint.failures)
+    save_metrics(store, run, metrics_path)
+    print(f"Backfill: {summary['articles']} articles stored from {summary['windows']} windows, "
+          f"{summary['skipped']} windows already done, {outstanding} failures left in {checkpoint_path}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the article store read by the Streamlit dashboard")
+    parser.add_argument("--setup", action="store_true",
+                        help="install the NLTK data the pipeline needs into NLTK_DATA_DIR and exit")
+    parser.add_argument("--refresh", action="store_true",
+                        help="query the API even if the stored articles are recent")
+    parser.add_argument("--full", action="store_true",
+                        help="fetch the latest articles again instead of only the ones published since the last run")
+    parser.add_argument("--every", type=int, metavar="SECONDS",
+                        help="keep running and refresh the store every SECONDS seconds")
+    parser.add_argument("--store", default=STORE_PATH, help="path of the article store")
+    parser.add_argument("--subjects", default=SUBJECTS_FILE, help="JSON file listing the subjects to analyze")
+    parser.add_argument("--export", metavar="PATH",
+                        help="also append the new articles to PATH, as part files of a Parquet dataset directory "
+                             "for .parquet paths or as JSON lines otherwise")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="also write the per-stage timings and counters of every run to PATH, as Prometheus "
+                             "text for .prom files or appended JSON lines with per-article events otherwise")
+    parser.add_argument("--backfill", nargs=2, metavar=("FROM", "TO"),
+                        help="store every article published from FROM to TO (YYYY-MM-DD) and exit, rerun the "
+                             "same command to resume an interrupted backfill")
+    parser.add_argument("--window-days", type=int, default=7,
+                        help="days of articles fetched as one unit of work by --backfill")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="windows fetched from the API at the same time by --backfill")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH,
+                        help="log of the finished windows and failures of --backfill, read back to resume it")
+    args = parser.parse_args(argv)
+
+    if args.setup:
+        setup()
+        return
+
+    store = open_store(args.store)
+    subjects = load_subjects(args.subjects)
+    if args.backfill:
+        run_backfill(store, subjects, *args.backfill, window_days=args.window_days, workers=args.workers,
+                     checkpoint_path=args.checkpoint, metrics_path=args.metrics)
+        return
+    writer = open_writer(args.export) if args.export else None
+    try:
+        if args.every is None:
+            refresh(store, subjects, force=args.refresh or args.full, incremental=not args.full, writer=writer,
+                    metrics_path=args.metrics)
+            return
+
+        while True:
+            # A failed refresh (e.g. a Guardian outage) keeps the previous articles and retries next time
+            try:
+                refresh(store, subjects, force=True, incremental=not args.full, writer=writer,
+                        metrics_path=args.metrics)
+            except Exception:
+                traceback.print_exc()
+            time.sleep(args.every)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+if __name__ == "__main__":
+    main()